@@ -0,0 +1,273 @@
+"""Record/replay archive of cycle inputs.
+
+Layout under the archive directory:
+    objects/ab/abcdef....gz   gzip-compressed blobs named by the sha256 of their content
+    cycles/<cycle_id>.json    one manifest per recorded cycle
+    replays/<cycle_id>.json   output of replaying a cycle
+
+A manifest maps each source to its recorded response and each chat-completion
+prompt to its recorded reply, and points at the per-headline classifications
+(cache hits included), the JMoney signals and the carried-forward results the
+cycle ran with. Identical pages and replies are stored once.
+RecordingSession / RecordingClient / RecordingCache wrap the live HTTP
+session, OpenAI client and classification cache while recording;
+ReplaySession / ReplayClient serve the recorded data back so a replay needs
+no network.
+"""
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from types import SimpleNamespace
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping with a recorded page
+RECORDED_HEADERS = ("Content-Type", "Date", "ETag", "Last-Modified")
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class ReplayMissError(LookupError):
+    """The archive has no recording for a request made during replay."""
+
+
+class Archive:
+    def __init__(self, root):
+        self.root = root
+        self.current = None
+        self._classifications = {}
+        self._lock = threading.Lock()
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def put(self, data):
+        """Store bytes once under their sha256; returns the digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        with gzip.open(self._object_path(digest), "rb") as f:
+            return f.read()
+
+    def put_json(self, value):
+        return self.put(json.dumps(value, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+
+    def get_json(self, digest):
+        return json.loads(self.get(digest))
+
+    # Recording
+
+    def start_cycle(self, tickers, now=None):
+        """Begin recording a cycle; now is the naive UTC time the pipeline scores against."""
+        now = now or datetime.datetime.utcnow()
+        with self._lock:
+            self.current = {
+                "cycle": now.strftime("%Y%m%dT%H%M%S.%fZ"),
+                "started_at": now.isoformat() + "Z",
+                "tickers": self.put_json(tickers),
+                "sources": {},
+                "completions": {},
+            }
+            self._classifications = {}
+        return self.current["cycle"]
+
+    def record_page(self, url, response=None, error=None):
+        if self.current is None:
+            return
+        if error is not None:
+            entry = {"error": str(error)}
+        else:
+            entry = {
+                "status": response.status_code,
+                "encoding": response.encoding,
+                "headers": {k: response.headers[k] for k in RECORDED_HEADERS if k in response.headers},
+                "body": self.put(response.content),
+            }
+        with self._lock:
+            self.current["sources"][url] = entry
+
+    def record_completion(self, prompt, content):
+        if self.current is None:
+            return
+        digest = self.put(content.encode("utf-8"))
+        with self._lock:
+            self.current["completions"][prompt_key(prompt)] = digest
+
+    def record_classification(self, key, result):
+        if self.current is None:
+            return
+        with self._lock:
+            self._classifications[key] = result
+
+    def record_value(self, name, value):
+        """Attach a JSON value (e.g. JMoney signals, carried results) to the current cycle."""
+        if self.current is None:
+            return
+        digest = self.put_json(value)
+        with self._lock:
+            self.current[name] = digest
+
+    def finish_cycle(self):
+        """Write the current cycle's manifest; returns its path."""
+        with self._lock:
+            manifest, self.current = self.current, None
+            classifications, self._classifications = self._classifications, {}
+        if manifest is None:
+            return None
+        manifest["classifications"] = self.put_json(classifications)
+        path = os.path.join(self.root, "cycles", manifest["cycle"] + ".json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        logger.info(
+            "[Archive] Recorded cycle %s: %d pages, %d completions",
+            manifest["cycle"], len(manifest["sources"]), len(manifest["completions"]),
+        )
+        return path
+
+    # Replay
+
+    def cycles(self):
+        """Recorded cycle ids, oldest first."""
+        try:
+            names = os.listdir(os.path.join(self.root, "cycles"))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load_cycle(self, cycle_id):
+        """Manifest for a cycle id, or for the newest cycle when cycle_id is "latest"."""
+        if cycle_id == "latest":
+            cycles = self.cycles()
+            if not cycles:
+                raise ReplayMissError(f"no recorded cycles in {self.root}")
+            cycle_id = cycles[-1]
+        with open(os.path.join(self.root, "cycles", cycle_id + ".json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_replay(self, cycle_id, output):
+        path = os.path.join(self.root, "replays", cycle_id + ".json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=1, default=str)
+        return path
+
+
+class RecordingSession:
+    """Wraps a requests.Session and records every GET into the archive.
+
+    Conditional-request headers are dropped so each recorded cycle holds the
+    full page bodies; unchanged pages are still stored only once.
+    """
+
+    def __init__(self, session, archive):
+        self.session = session
+        self.archive = archive
+
+    def get(self, url, headers=None, **kwargs):
+        headers = {
+            k: v for k, v in (headers or {}).items()
+            if k.lower() not in ("if-none-match", "if-modified-since")
+        }
+        try:
+            response = self.session.get(url, headers=headers, **kwargs)
+        except Exception as e:
+            self.archive.record_page(url, error=e)
+            raise
+        self.archive.record_page(url, response)
+        return response
+
+
+class ReplaySession:
+    """Serves recorded responses by URL; never touches the network."""
+
+    def __init__(self, archive, manifest):
+        self.archive = archive
+        self.sources = manifest["sources"]
+
+    def get(self, url, headers=None, **kwargs):
+        entry = self.sources.get(url)
+        if entry is None:
+            raise ReplayMissError(f"no recorded response for {url}")
+        if "error" in entry:
+            raise requests.ConnectionError(entry["error"])
+        response = requests.Response()
+        response.url = url
+        response.status_code = entry["status"]
+        response.encoding = entry["encoding"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = self.archive.get(entry["body"])
+        return response
+
+
+class RecordingClient:
+    """Wraps an OpenAI client; chat completions are recorded by prompt."""
+
+    def __init__(self, client, archive):
+        self.client = client
+        self.archive = archive
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        response = self.client.chat.completions.create(**kwargs)
+        self.archive.record_completion(kwargs["messages"][0]["content"], response.choices[0].message.content)
+        return response
+
+
+class ReplayClient:
+    """Answers chat completions with the replies recorded for the same prompt."""
+
+    def __init__(self, archive, manifest):
+        self.archive = archive
+        self.completions = manifest["completions"]
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        digest = self.completions.get(prompt_key(kwargs["messages"][0]["content"]))
+        if digest is None:
+            raise ReplayMissError("no recorded completion for this prompt")
+        content = self.archive.get(digest).decode("utf-8")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class RecordingCache:
+    """Wraps a ClassificationCache; every result read from or written to it is recorded.
+
+    Batches are planned from cache misses only, so their prompts depend on
+    what was cached at the time. Recording results per cache key lets a
+    replay start from the same classifications regardless.
+    """
+
+    def __init__(self, cache, archive):
+        self.cache = cache
+        self.archive = archive
+
+    def get(self, key):
+        result = self.cache.get(key)
+        if result is not None:
+            self.archive.record_classification(key, result)
+        return result
+
+    def set(self, key, result):
+        self.cache.set(key, result)
+        self.archive.record_classification(key, result)
+
+    def __getattr__(self, name):
+        return getattr(self.cache, name)
@@ -0,0 +1,156 @@
+"""End-to-end cycle benchmark against local stand-ins for every external service.
+
+Runs main.fetch_and_process() at 10, 1,000 and 10,000 tickers with generated
+source pages (benchmarks/fakes.py: fixture HTTP server, fake chat-completions
+endpoint, in-memory gspread, fake Telegram Bot API). Each scale runs in its
+own process with a fresh STATE_DIR: a cold cycle where everything is new,
+then a warm cycle where every page answers 304. Reports cycle time, calls
+per service and peak memory.
+
+Run from the repository root:
+    python benchmarks/bench_cycle.py [--scales 10,1000,10000] [--gpt-latency 0.05] [--gpt-error-rate 0]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SOURCE_COUNT = 12
+WORDS = ["shares", "rally", "after", "earnings", "beat", "guidance", "cut", "analysts", "upgrade",
+         "regulator", "probe", "deal", "talks", "record", "output", "slump", "outlook", "raised"]
+
+
+def make_tickers(count):
+    return {f"TK{i:05d}": [f"TK{i:05d}", f"Corp{i:05d}"] for i in range(count)}
+
+
+def make_pages(tickers, per_source, seed=0):
+    """SOURCE_COUNT fixture pages, each with per_source headlines naming one ticker alias."""
+    rng = random.Random(seed)
+    aliases = [aliases[-1] for aliases in tickers.values()]
+    pages = {}
+    number = 0
+    for s in range(SOURCE_COUNT):
+        items = []
+        for _ in range(per_source):
+            number += 1
+            words = " ".join(rng.choice(WORDS) for _ in range(5))
+            items.append(f"<article><h3>{rng.choice(aliases)} {words} {number}</h3></article>")
+        pages[f"Fixture{s + 1:02d}"] = "<html><body>" + "".join(items) + "</body></html>"
+    return pages
+
+
+def run_child(args):
+    from fakes import FakeGspreadClient, FakeOpenAI, FakeTelegram, FixtureServer
+
+    tickers = make_tickers(args.child)
+    per_source = args.headlines_per_source or max(50, args.child // 20)
+    fixtures = FixtureServer(make_pages(tickers, per_source)).start()
+    openai_fake = FakeOpenAI(latency=args.gpt_latency, error_rate=args.gpt_error_rate).start()
+    telegram_fake = FakeTelegram().start()
+
+    state_dir = tempfile.mkdtemp(prefix="bench_cycle_")
+    sources_file = os.path.join(state_dir, "sources.json")
+    with open(sources_file, "w") as f:
+        json.dump(fixtures.sources(), f)
+    # Must be in place before the repo's modules read config
+    os.environ.update({
+        "STATE_DIR": state_dir,
+        "SOURCES_FILE": sources_file,
+        "OPENAI_BASE_URL": openai_fake.base_url(),
+        "OPENAI_KEY": "bench",
+        "TELEGRAM_API_URL": telegram_fake.url,
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "SHEET_NAME": "bench",
+        "METRICS_PORT": "0",
+        "LOG_LEVEL": "WARNING",
+        "LOG_FILE": os.path.join(state_dir, "bench.log"),
+    })
+    for name in ("OPENAI_REQUESTS_PER_MINUTE", "OPENAI_TOKENS_PER_MINUTE", "TELEGRAM_MESSAGES_PER_MINUTE"):
+        os.environ.setdefault(name, "0")
+    sys.path.insert(0, ROOT)
+
+    import config
+    import main
+    import sheets_client
+    import telegram_bot
+    from log_setup import setup_logging
+
+    setup_logging()
+    config.TICKERS = tickers
+    gspread_fake = FakeGspreadClient()
+    gspread_fake.open("Jmoney_Engine").add_worksheet("Confirmed", [["ticker", "tp_strategy", "signal_id"]] + [
+        [ticker, "Swing", f"SIG{i}"] for i, ticker in enumerate(list(tickers)[::10])
+    ])
+    sheets_client.set_client(gspread_fake)
+
+    services = {"sources": fixtures, "openai": openai_fake, "sheets": gspread_fake, "telegram": telegram_fake}
+    report = {"tickers": len(tickers), "headlines_per_source": per_source, "cycles": []}
+    for label in ("cold", "warm"):
+        before = {name: sum(service.calls.values()) for name, service in services.items()}
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = main.fetch_and_process(all_sources=True)
+        processed = time.perf_counter()
+        telegram_bot.flush_messages(timeout=600)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["cycles"].append({
+            "cycle": label,
+            "seconds": elapsed,
+            "telegram_drain_seconds": elapsed - (processed - start),
+            "new": result["new_count"] if result else 0,
+            "calls": {name: sum(service.calls.values()) - before[name] for name, service in services.items()},
+            "peak_traced_mb": peak / 2 ** 20,
+        })
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for server in (fixtures, openai_fake, telegram_fake):
+        server.stop()
+    shutil.rmtree(state_dir, ignore_errors=True)
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="10,1000,10000", help="comma-separated ticker counts")
+    parser.add_argument("--headlines-per-source", type=int, default=0,
+                        help="headlines on each fixture page (default: max(50, tickers / 20))")
+    parser.add_argument("--gpt-latency", type=float, default=0.05, help="seconds per fake completion")
+    parser.add_argument("--gpt-error-rate", type=float, default=0.0, help="share of completions failing with 429/500")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        run_child(args)
+        return
+
+    print(f"{'tickers':>8} {'cycle':>5} {'seconds':>8} {'tg drain':>8} {'new':>6} {'pages':>6} {'gpt':>5} "
+          f"{'sheets':>6} {'tg':>6} {'peak MB':>8} {'rss MB':>7}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        command = [sys.executable, os.path.abspath(__file__), "--child", str(scale),
+                   "--headlines-per-source", str(args.headlines_per_source),
+                   "--gpt-latency", str(args.gpt_latency), "--gpt-error-rate", str(args.gpt_error_rate)]
+        output = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+        if output.returncode != 0:
+            print(f"{scale:>8} failed:\n{output.stderr}")
+            continue
+        report = json.loads(output.stdout.strip().splitlines()[-1])
+        for cycle in report["cycles"]:
+            calls = cycle["calls"]
+            print(f"{report['tickers']:>8} {cycle['cycle']:>5} {cycle['seconds']:>8.2f} "
+                  f"{cycle['telegram_drain_seconds']:>8.2f} {cycle['new']:>6} "
+                  f"{calls['sources']:>6} {calls['openai']:>5} {calls['sheets']:>6} {calls['telegram']:>6} "
+                  f"{cycle['peak_traced_mb']:>8.1f} {report['max_rss_mb']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Import-time budget for the entry points.
+
+Imports each module in a fresh interpreter with `python -X importtime`,
+several times, and reports the median cumulative import time and the
+slowest imports it pulled in. Fails (exit status 1) when a module is over
+budget or loads one of the heavy client libraries at import time; those
+are imported where they are first used (see main.py).
+
+Run from the repository root:
+    python benchmarks/bench_import.py [--modules main] [--budget-ms 100] [--runs 5]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Top-level packages an entry point must not import until a cycle needs them
+HEAVY = ("openai", "gspread", "google", "bs4", "lxml", "numpy", "requests")
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module):
+    """One fresh import of module; returns (total_us, {name: self_us}, heavy packages loaded)."""
+    code = (
+        f"import sys; import {module}; "
+        f"print(','.join(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY!r}))))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=ROOT, check=True,
+    )
+    total = 0
+    self_times = {}
+    for match in _LINE.finditer(output.stderr):
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        self_times[name] = self_us
+        if name == module and len(indent) == 1:
+            total = cumulative_us
+    heavy = [name for name in output.stdout.strip().split(",") if name]
+    return total, self_times, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", default="main", help="comma-separated modules")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="max median import time per module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules.split(","):
+        runs = [measure(module) for _ in range(args.runs)]
+        median_ms = statistics.median(total for total, _, _ in runs) / 1000
+        heavy = sorted({name for _, _, loaded in runs for name in loaded})
+        over = median_ms > args.budget_ms
+        failed |= over or bool(heavy)
+        status = "FAIL" if over or heavy else "ok"
+        print(f"{module:<22} {median_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)  {status}")
+        if heavy:
+            print(f"{'':<22} imports at load time: {', '.join(heavy)}")
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for name, self_us in slowest:
+            print(f"{'':<22} {self_us / 1000:8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
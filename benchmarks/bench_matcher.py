@@ -0,0 +1,76 @@
+"""Alias matching throughput: nested ticker/alias loop vs AliasMatcher.
+
+Run from the repository root:
+    python benchmarks/bench_matcher.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from matcher import AliasMatcher
+
+WORDS = ["shares", "rally", "after", "earnings", "beat", "guidance", "cut", "stock", "falls",
+         "record", "quarter", "analysts", "upgrade", "deal", "merger", "outlook", "market", "rate"]
+
+
+def make_ticker_map(count, rng):
+    ticker_map = {}
+    while len(ticker_map) < count:
+        symbol = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(3, 5)))
+        name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9))).title()
+        ticker_map[symbol] = [symbol, f"{name} Corp"]
+    return ticker_map
+
+
+def make_headlines(ticker_map, count, rng):
+    aliases = [alias for values in ticker_map.values() for alias in values]
+    headlines = []
+    for _ in range(count):
+        words = rng.sample(WORDS, 8)
+        words.insert(rng.randint(0, len(words)), rng.choice(aliases))
+        headlines.append(" ".join(words))
+    return headlines
+
+
+def naive_match(ticker_map, text):
+    matched = []
+    for ticker in ticker_map:
+        for alias in ticker_map[ticker]:
+            if alias.lower() in text.lower():
+                matched.append(ticker)
+                break
+    return matched
+
+
+def throughput(fn, headlines, budget=2.0):
+    """Texts per second, stopping once the time budget is spent."""
+    start = time.perf_counter()
+    done = 0
+    for text in headlines:
+        fn(text)
+        done += 1
+        if time.perf_counter() - start > budget:
+            break
+    return done / (time.perf_counter() - start)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'tickers':>8} {'build (ms)':>11} {'naive texts/s':>14} {'automaton texts/s':>18} {'speedup':>8}")
+    for count in (10, 1_000, 10_000):
+        ticker_map = make_ticker_map(count, rng)
+        headlines = make_headlines(ticker_map, 5_000, rng)
+        start = time.perf_counter()
+        matcher = AliasMatcher(ticker_map)
+        build_ms = (time.perf_counter() - start) * 1000
+        naive = throughput(lambda text: naive_match(ticker_map, text), headlines)
+        fast = throughput(matcher.match, headlines)
+        print(f"{count:>8} {build_ms:>11.1f} {naive:>14,.0f} {fast:>18,.0f} {fast / naive:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Adaptive scoring at 100k headlines: the old per-headline loop vs scoring.score_headlines.
+
+Run from the repository root:
+    python benchmarks/bench_scoring.py [count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from scoring import SCORING_PARAMS, score_headlines
+
+SOURCES = ["YahooFinance", "MarketWatch", "Reuters", "Bloomberg", "Investing", "Finviz", "CNBC"]
+
+
+def legacy_loop(recent, recent_count, sources, positive, macro_ratio, confirmed):
+    """The per-headline scoring previously inlined in main.fetch_and_process."""
+    out = []
+    for i in range(len(recent)):
+        recency_weight = SCORING_PARAMS.get("recency_weight", 0.4)
+        volume_weight = SCORING_PARAMS.get("volume_weight", 0.2)
+        reliability_weight = SCORING_PARAMS.get("reliability_weight", 0.2)
+        macro_weight = SCORING_PARAMS.get("macro_weight", 0.1)
+        jmoney_confirm_weight = SCORING_PARAMS.get("jmoney_confirm_weight", 0.1)
+        recency_score = 1 if recent[i] else 0
+        volume_score = 1 if recent_count[i] > 3 else 0
+        if sources[i] in ["MarketWatch", "Reuters"]:
+            reliability_score = 1
+        elif sources[i] == "Finviz":
+            reliability_score = -0.5
+        else:
+            reliability_score = 0
+        macro_score_val = 1 if macro_ratio[i] > 0.6 and positive[i] else 0
+        jmoney_score = 1 if confirmed[i] else 0
+        confidence = (
+            recency_score * recency_weight +
+            volume_score * volume_weight +
+            reliability_score * reliability_weight +
+            macro_score_val * macro_weight +
+            jmoney_score * jmoney_confirm_weight
+        ) * 10
+        confidence = min(10, max(0, round(confidence, 2)))
+        if confidence >= 8:
+            flag = "🟢"
+        elif confidence >= 5:
+            flag = "🟡"
+        else:
+            flag = "🔴"
+        out.append((confidence, flag))
+    return out
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(7)
+    recent = [rng.random() < 0.7 for _ in range(count)]
+    recent_count = [rng.randint(0, 8) for _ in range(count)]
+    sources = [rng.choice(SOURCES) for _ in range(count)]
+    positive = [rng.random() < 0.3 for _ in range(count)]
+    macro_ratio = [rng.random() for _ in range(count)]
+    confirmed = [rng.random() < 0.2 for _ in range(count)]
+    columns = (recent, recent_count, sources, positive, macro_ratio, confirmed)
+
+    start = time.perf_counter()
+    expected = legacy_loop(*columns)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = score_headlines(*columns)
+    vectorized = time.perf_counter() - start
+
+    assert np.allclose(scores["confidence"], [c for c, _ in expected])
+    assert scores["flag"].tolist() == [f for _, f in expected]
+    print(f"headlines:      {count:,}")
+    print(f"legacy loop:    {legacy * 1000:8.1f} ms")
+    print(f"score_headlines:{vectorized * 1000:8.1f} ms ({legacy / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
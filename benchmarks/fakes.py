@@ -0,0 +1,303 @@
+"""Local stand-ins for the external services a cycle talks to.
+
+- FixtureServer: serves recorded (or generated) pages for a sources file, with ETags
+- FakeOpenAI: chat-completions endpoint with configurable latency and error rate
+- FakeGspreadClient: in-memory gspread client for sheets_client.set_client()
+- FakeTelegram: sendMessage / deleteMessages / getUpdates of the Bot API
+
+The HTTP fakes listen on 127.0.0.1 on a free port; point the repo at them
+with SOURCES_FILE, OPENAI_BASE_URL and TELEGRAM_API_URL. Every fake counts
+the calls it receives in .calls ({name: count}).
+"""
+import collections
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_BATCH_LINE = re.compile(r"^\s*(\d+)\. Headline:", re.MULTILINE)
+_CELL = re.compile(r"([A-Z]+)(\d+)")
+
+
+class _Server:
+    """ThreadingHTTPServer on a free local port whose requests go to self.handle()."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+        self._calls_lock = threading.Lock()
+        owner = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                owner._dispatch(self, "GET")
+
+            def do_POST(self):
+                owner._dispatch(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def count(self, name):
+        with self._calls_lock:
+            self.calls[name] += 1
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _dispatch(self, request, method):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        status, headers, payload = self.handle(method, request.path, request.headers, body)
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload).encode("utf-8")
+            headers = {"Content-Type": "application/json", **headers}
+        request.send_response(status)
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def handle(self, method, path, headers, body):
+        raise NotImplementedError
+
+
+class FixtureServer(_Server):
+    """Serves pages[name] at /<name>, answering If-None-Match with 304."""
+
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = {}
+        for name, html in pages.items():
+            data = html.encode("utf-8")
+            self.pages[name] = (data, '"%s"' % hashlib.sha1(data).hexdigest())
+
+    def sources(self):
+        """A sources.json mapping every page to its local URL."""
+        return {name: f"{self.url}/{name}" for name in self.pages}
+
+    def handle(self, method, path, headers, body):
+        page = self.pages.get(path.lstrip("/"))
+        if page is None:
+            self.count("404")
+            return 404, {}, b""
+        data, etag = page
+        if headers.get("If-None-Match") == etag:
+            self.count("304")
+            return 304, {"ETag": etag}, b""
+        self.count("200")
+        return 200, {"ETag": etag, "Content-Type": "text/html; charset=utf-8"}, data
+
+
+class FakeOpenAI(_Server):
+    """POST /v1/chat/completions answering single and numbered batch prompts.
+
+    latency is seconds per request; error_rate is the share of requests
+    answered with 429 (with retry-after-ms) or 500.
+    """
+
+    def __init__(self, latency=0.05, error_rate=0.0, seed=0):
+        super().__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def base_url(self):
+        return f"{self.url}/v1"
+
+    def _result(self, text):
+        with self._random_lock:
+            category = self.random.choice(("Positive Catalyst", "Negative Catalyst", "No News"))
+            confidence = self.random.randint(0, 10)
+        return {
+            "category": category,
+            "summary": " ".join(text.split()[:8]),
+            "confidence": confidence,
+            "filter_decision": category != "No News" and confidence >= 6,
+        }
+
+    def handle(self, method, path, headers, body):
+        if method != "POST" or not path.endswith("/chat/completions"):
+            return 404, {}, b""
+        self.count("chat.completions")
+        if self.latency:
+            time.sleep(self.latency)
+        with self._random_lock:
+            fail = self.random.random() < self.error_rate
+            rate_limited = self.random.random() < 0.5
+        if fail:
+            self.count("errors")
+            if rate_limited:
+                return 429, {"retry-after-ms": "50"}, {"error": {"message": "Rate limit", "type": "rate_limit"}}
+            return 500, {}, {"error": {"message": "Server error", "type": "server_error"}}
+
+        request = json.loads(body)
+        prompt = request["messages"][0]["content"]
+        numbers = _BATCH_LINE.findall(prompt)
+        if numbers:
+            lines = prompt.splitlines()
+            content = json.dumps([
+                {"id": int(number), **self._result(line)}
+                for number, line in zip(numbers, (l for l in lines if _BATCH_LINE.match(l)))
+            ])
+        else:
+            content = json.dumps(self._result(prompt))
+        return 200, {}, {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+
+class FakeTelegram(_Server):
+    """Bot API methods used by telegram_bot.py and commands.py."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def handle(self, method, path, headers, body):
+        api_method = path.split("?", 1)[0].rsplit("/", 1)[-1]
+        self.count(api_method)
+        if api_method == "sendMessage":
+            with self._lock:
+                message_id = self._next_id
+                self._next_id += 1
+                self.messages[message_id] = body
+            return 200, {}, {"ok": True, "result": {"message_id": message_id}}
+        if api_method == "deleteMessages":
+            ids = json.loads(body or b"{}").get("message_ids", [])
+            with self._lock:
+                for message_id in ids:
+                    self.messages.pop(message_id, None)
+            return 200, {}, {"ok": True, "result": True}
+        if api_method == "getUpdates":
+            return 200, {}, {"ok": True, "result": []}
+        return 404, {}, {"ok": False, "description": "Not Found"}
+
+
+def _column_index(letters):
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+class FakeWorksheet:
+    def __init__(self, client, title, rows=None, row_count=1000):
+        self.client = client
+        self.title = title
+        self.rows = [list(row) for row in rows or []]
+        self.row_count = max(row_count, len(self.rows))
+
+    def get_all_values(self):
+        self.client.count("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        self.client.count("get_all_records")
+        if not self.rows:
+            return []
+        header = self.rows[0]
+        return [dict(zip(header, row)) for row in self.rows[1:]]
+
+    def add_rows(self, rows):
+        self.client.count("add_rows")
+        self.row_count += rows
+
+    def _write(self, start_row, start_col, values):
+        for offset, row in enumerate(values):
+            index = start_row - 1 + offset
+            while len(self.rows) <= index:
+                self.rows.append([])
+            target = self.rows[index]
+            while len(target) < start_col - 1 + len(row):
+                target.append("")
+            target[start_col - 1:start_col - 1 + len(row)] = [str(v) for v in row]
+
+    def batch_update(self, data, value_input_option=None):
+        self.client.count("batch_update")
+        for entry in data:
+            column, row = _CELL.match(entry["range"].split(":")[0]).groups()
+            self._write(int(row), _column_index(column), entry["values"])
+
+    def batch_clear(self, ranges):
+        self.client.count("batch_clear")
+        for cell_range in ranges:
+            start, end = cell_range.split(":")
+            first = int(_CELL.match(start).group(2))
+            last = int(_CELL.match(end).group(2))
+            for index in range(first - 1, min(last, len(self.rows))):
+                self.rows[index] = []
+        while self.rows and not any(self.rows[-1]):
+            self.rows.pop()
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title):
+        self.client = client
+        self.title = title
+        self.worksheets = {}
+        self.updated = "2024-01-01T00:00:00.000Z"
+
+    @property
+    def sheet1(self):
+        if not self.worksheets:
+            self.add_worksheet("Sheet1")
+        return next(iter(self.worksheets.values()))
+
+    def add_worksheet(self, title, rows=None):
+        self.worksheets[title] = FakeWorksheet(self.client, title, rows)
+        return self.worksheets[title]
+
+    def worksheet(self, title):
+        self.client.count("worksheet")
+        return self.worksheets.get(title) or self.add_worksheet(title)
+
+    def get_lastUpdateTime(self):
+        self.client.count("get_lastUpdateTime")
+        return self.updated
+
+
+class FakeGspreadClient:
+    """Spreadsheets are created on first open()."""
+
+    def __init__(self):
+        self.spreadsheets = {}
+        self.calls = collections.Counter()
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def open(self, title):
+        self.count("open")
+        if title not in self.spreadsheets:
+            self.spreadsheets[title] = FakeSpreadsheet(self, title)
+        return self.spreadsheets[title]
@@ -1,45 +1,290 @@
-from openai import OpenAI
-from config import OPENAI_API_KEY
+from config import (
+    OPENAI_API_KEY, OPENAI_MODEL, STATE_DIR,
+    CLASSIFY_CACHE_MAX_ENTRIES, CLASSIFY_CACHE_MAX_AGE_HOURS, CLASSIFY_BATCH_TOKENS,
+    CLASSIFY_MAX_WORKERS, OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE, OPENAI_MAX_RETRIES,
+)
+from classify_cache import ClassificationCache, hash_value
+from rate_limit import TokenBucket, backoff_delay
+import metrics
 from dotenv import load_dotenv
 load_dotenv()
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
+import logging
+import threading
+import time
 
-def load_prompt():
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ("Positive Catalyst", "Negative Catalyst", "No News")
+DEFAULT_RESULT = {"category": "No News", "summary": "", "confidence": 0, "filter_decision": False}
+# Marks DEFAULT_RESULT returned because classification failed, so the headline is retried next cycle
+FAILED_KEY = "failed"
+# Completion tokens reserved per headline in a batch response
+BATCH_TOKENS_PER_ITEM = 80
+
+def load_prompt(key="template"):
     prompt_path = os.path.join(os.path.dirname(__file__), "config", "prompt.json")
     with open(prompt_path, "r", encoding="utf-8") as f:
         data = json.load(f)
-        return data["template"]
+        return data[key]
 
 GPT_PROMPT = load_prompt()
+GPT_BATCH_PROMPT = load_prompt("batch_template")
+PROMPT_HASH = hash_value([GPT_PROMPT, GPT_BATCH_PROMPT])
+
+_client = None
+_cache = None
+_lock = threading.Lock()
+request_bucket = TokenBucket(OPENAI_REQUESTS_PER_MINUTE)
+token_bucket = TokenBucket(OPENAI_TOKENS_PER_MINUTE)
+
+def get_client():
+    """Return the shared OpenAI client. Retries are handled by create_completion()."""
+    global _client
+    with _lock:
+        if _client is None:
+            # Imported on first use: openai is the slowest import, and a cycle served from cache never needs it
+            from openai import OpenAI
+            _client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+    return _client
+
+def set_client(client):
+    """Replace the shared client, e.g. with an archive recorder or replayer (see archive.py)."""
+    global _client
+    with _lock:
+        _client = client
+
+def _retry_after(error):
+    """Seconds from a Retry-After / retry-after-ms header on an API error, or None."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def _is_retryable(error):
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+def create_completion(prompt, max_tokens):
+    """Rate-limited chat completion returning the reply text.
+
+    Waits on the shared request and token buckets, and retries rate-limit,
+    timeout, connection and 5xx errors with jittered exponential backoff,
+    honoring Retry-After when the API sends one.
+    """
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        request_bucket.acquire()
+        token_bucket.acquire(estimate_tokens(prompt) + max_tokens)
+        try:
+            with metrics.GPT_CALL_SECONDS.time(cache="miss"):
+                response = get_client().chat.completions.create(
+                    model=OPENAI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    n=1,
+                    temperature=0
+                )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            if attempt >= OPENAI_MAX_RETRIES or not _is_retryable(e):
+                metrics.ERRORS.inc(component="openai")
+                raise
+            metrics.RETRIES.inc(component="openai")
+            delay = _retry_after(e)
+            if delay is not None:
+                # The limit is account-wide, so hold every worker back
+                request_bucket.pause(delay)
+            else:
+                delay = backoff_delay(attempt)
+            logger.warning("[OpenAI] %s, retrying in %.1fs (attempt %d)", type(e).__name__, delay, attempt + 1)
+            time.sleep(delay)
+
+def get_cache():
+    """Return the process-wide classification cache, opening it on first use."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = ClassificationCache(
+                os.path.join(STATE_DIR, "classify_cache.sqlite3"),
+                max_entries=CLASSIFY_CACHE_MAX_ENTRIES,
+                max_age=CLASSIFY_CACHE_MAX_AGE_HOURS * 3600,
+            )
+    return _cache
+
+def set_cache(cache):
+    """Replace the classification cache, e.g. with an in-memory one so a replay bypasses it."""
+    global _cache
+    with _lock:
+        _cache = cache
+
+def cache_stats():
+    """Hit/miss counters and entry count of the classification cache."""
+    return get_cache().stats()
 
-def classify_headline(headline, jmoney_context=None):
-    client = OpenAI(api_key=OPENAI_API_KEY)
+def cache_key(headline, jmoney_context=None):
+    return get_cache().make_key(headline, hash_value(jmoney_context), PROMPT_HASH, OPENAI_MODEL)
+
+def format_context(jmoney_context):
     # Compose context string for GPT
     context_str = ""
     if jmoney_context:
         context_str = "\nJMoney context for this ticker: "
         for k, v in jmoney_context.items():
             context_str += f"{k}: {v}, "
-    prompt = GPT_PROMPT.format(headline=headline, context=context_str)
+    return context_str
+
+def validate_result(result):
+    """Return a normalized classification dict, or None if result is malformed."""
+    if not isinstance(result, dict) or result.get("category") not in CATEGORIES:
+        return None
+    try:
+        confidence = float(result.get("confidence", 0))
+    except (TypeError, ValueError):
+        return None
+    filter_decision = result.get("filter_decision", False)
+    if isinstance(filter_decision, str):
+        filter_decision = filter_decision.strip().lower() == "true"
+    return {
+        "category": result["category"],
+        "summary": str(result.get("summary", "")),
+        "confidence": confidence,
+        "filter_decision": bool(filter_decision),
+    }
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def _classify_single(headline, jmoney_context):
+    """One uncached chat completion for a single headline."""
+    prompt = GPT_PROMPT.format(headline=headline, context=format_context(jmoney_context))
+    # A second attempt covers replies without valid JSON; API errors are retried inside create_completion
     max_attempts = 2
     for attempt in range(max_attempts):
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=120,
-                n=1,
-                temperature=0
-            )
-            content = response.choices[0].message.content.strip()
+            content = create_completion(prompt, max_tokens=120)
             # Try to find JSON in response
             start = content.find('{')
             end = content.rfind('}')
             if start != -1 and end != -1:
                 json_str = content[start:end+1]
-                result = json.loads(json_str)
-                return result
+                result = validate_result(json.loads(json_str))
+                if result is not None:
+                    get_cache().set(cache_key(headline, jmoney_context), result)
+                    return result
+            logger.warning("[OpenAI] Malformed classification reply (attempt %d): %.200s", attempt + 1, content)
         except Exception as e:
-            print(f"[OpenAI Error] {e}")
-    return {"category": "No News", "summary": "", "confidence": 0, "filter_decision": False}
+            logger.error("[OpenAI Error] %s", e)
+    return dict(DEFAULT_RESULT, **{FAILED_KEY: True})
+
+def _batch_line(number, headline, jmoney_context):
+    context_str = format_context(jmoney_context).strip() or "JMoney context: none"
+    return f"{number}. Headline: {headline}\n   {context_str}"
+
+def plan_batches(items, max_tokens=CLASSIFY_BATCH_TOKENS):
+    """Split (headline, jmoney_context) items into index lists that fit max_tokens.
+
+    The budget covers the prompt plus the completion tokens reserved for
+    each headline; an item that alone exceeds it still gets its own batch.
+    """
+    overhead = estimate_tokens(GPT_BATCH_PROMPT)
+    batches = []
+    current = []
+    used = overhead
+    for index, (headline, jmoney_context) in enumerate(items):
+        cost = estimate_tokens(_batch_line(len(current) + 1, headline, jmoney_context)) + BATCH_TOKENS_PER_ITEM
+        if current and used + cost > max_tokens:
+            batches.append(current)
+            current = []
+            used = overhead
+        current.append(index)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def classify_batch(items):
+    """Classify (headline, jmoney_context) items in one chat completion.
+
+    Returns one result per item, in order. Items missing from the response
+    or failing validation fall back to a single-headline request. The cache
+    is not consulted here; classify_many() filters hits beforehand.
+    """
+    if not items:
+        return []
+    if len(items) == 1:
+        return [_classify_single(*items[0])]
+    lines = [_batch_line(number, headline, ctx) for number, (headline, ctx) in enumerate(items, 1)]
+    prompt = GPT_BATCH_PROMPT.format(headlines="\n".join(lines))
+    parsed = {}
+    try:
+        content = create_completion(prompt, max_tokens=BATCH_TOKENS_PER_ITEM * len(items) + 50)
+        start = content.find('[')
+        end = content.rfind(']')
+        if start != -1 and end != -1:
+            for entry in json.loads(content[start:end+1]):
+                if isinstance(entry, dict):
+                    try:
+                        parsed[int(entry.get("id"))] = entry
+                    except (TypeError, ValueError):
+                        continue
+    except Exception as e:
+        logger.error("[OpenAI Error] Batch of %d failed: %s", len(items), e)
+
+    cache = get_cache()
+    results = []
+    for number, (headline, jmoney_context) in enumerate(items, 1):
+        result = validate_result(parsed.get(number))
+        if result is None:
+            result = _classify_single(headline, jmoney_context)
+        else:
+            cache.set(cache_key(headline, jmoney_context), result)
+        results.append(result)
+    return results
+
+def classify_many(items, max_tokens=CLASSIFY_BATCH_TOKENS, max_workers=CLASSIFY_MAX_WORKERS):
+    """Classify {key: (headline, jmoney_context)} and return {key: result}.
+
+    Cache hits are answered immediately. Remaining unique pairs are grouped
+    into token-budgeted batches that run concurrently on up to max_workers
+    threads, all sharing one client and the request/token rate limits.
+    """
+    cache = get_cache()
+    results = {}
+    pending = {}
+    for key, (headline, jmoney_context) in items.items():
+        ckey = cache_key(headline, jmoney_context)
+        if ckey in pending:
+            pending[ckey][1].append(key)
+            continue
+        start = time.perf_counter()
+        cached = cache.get(ckey)
+        if cached is not None:
+            metrics.GPT_CALL_SECONDS.observe(time.perf_counter() - start, cache="hit")
+            results[key] = cached
+        else:
+            pending[ckey] = ((headline, jmoney_context), [key])
+    metrics.HEADLINES_CLASSIFIED.inc(len(results), cache="hit")
+    metrics.HEADLINES_CLASSIFIED.inc(len(items) - len(results), cache="miss")
+    if not pending:
+        return results
+
+    entries = list(pending.values())
+    batches = plan_batches([pair for pair, _ in entries], max_tokens)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as pool:
+        futures = [(batch, pool.submit(classify_batch, [entries[i][0] for i in batch])) for batch in batches]
+        for batch, future in futures:
+            for i, result in zip(batch, future.result()):
+                for key in entries[i][1]:
+                    results[key] = dict(result)
+    return results
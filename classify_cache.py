@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def hash_value(value):
+    """Stable sha256 of any JSON-serializable value (dict keys sorted)."""
+    data = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """Persistent SQLite cache of GPT classification results.
+
+    Entries are keyed by make_key() and evicted by age (max_age seconds) and
+    by count (oldest first beyond max_entries). Recently used entries are
+    also kept in an in-process LRU so repeat lookups skip SQLite.
+    """
+
+    def __init__(self, path, max_entries=50000, max_age=7 * 86400, memory_entries=5000):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS classifications ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON classifications (created_at)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(headline, context_hash, prompt_hash, model):
+        return hash_value([headline, context_hash, prompt_hash, model])
+
+    def get(self, key):
+        """Return a copy of the cached result for key, or None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                row = self._conn.execute(
+                    "SELECT result, created_at FROM classifications WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (json.loads(row[0]), row[1])
+                    self._remember(key, entry)
+            else:
+                self._memory.move_to_end(key)
+            if entry is None or time.time() - entry[1] > self.max_age:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return dict(entry[0])
+
+    def set(self, key, result):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), now),
+            )
+            self._conn.commit()
+            self._remember(key, (dict(result), now))
+            self._writes_since_evict += 1
+            run_evict = self._writes_since_evict >= 500
+        if run_evict:
+            self.evict()
+
+    def evict(self):
+        """Drop entries older than max_age, then the oldest beyond max_entries."""
+        with self._lock:
+            self._writes_since_evict = 0
+            self._conn.execute("DELETE FROM classifications WHERE created_at < ?", (time.time() - self.max_age,))
+            count = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM classifications WHERE key IN "
+                    "(SELECT key FROM classifications ORDER BY created_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
@@ -0,0 +1,131 @@
+"""Near-duplicate headline clustering per ticker.
+
+The same story is usually picked up by several sources with small wording
+changes ("UPDATE 1-", "- Reuters", a word added or dropped). Each headline
+gets a 64-bit SimHash over its normalized words. Two headlines of one
+ticker are the same story when their fingerprints differ in at most
+max_distance bits and, as a check, one headline's words contain the
+other's: words may be added, never replaced, so "beats" and "misses"
+versions of a story stay apart. Only a cluster's first headline is
+classified and alerted. It carries the cluster's sources and size so
+scoring still sees how widely the story ran.
+"""
+import dataclasses
+import hashlib
+
+from seen_store import normalize_headline
+
+BITS = 64
+# Words that carry no story identity; dropping them keeps short headlines from matching on filler
+STOPWORDS = frozenset(
+    "a an and as at by for from in into is it its of on or says the to with".split()
+)
+# Added words that turn a story around; a headline that only adds one of these is a different story
+NEGATIONS = frozenset(
+    "not no never without denies denied deny rejects rejected fails failed misses missed "
+    "cancels canceled cancelled halts halted drops dropped scraps scrapped".split()
+)
+
+
+def words(text):
+    """The normalized words of a headline that SimHash and the containment check use."""
+    return frozenset(word for word in normalize_headline(text).split() if word not in STOPWORDS)
+
+
+def _word_hash(word):
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text):
+    """64-bit SimHash of a headline's normalized words."""
+    weights = [0] * BITS
+    for word in words(text):
+        h = _word_hash(word)
+        for bit in range(BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def distance(a, b):
+    """Number of differing bits between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def same_story(words_a, words_b):
+    """True when one headline's words contain the other's and nothing added is a negation."""
+    if words_a <= words_b:
+        added = words_b - words_a
+    elif words_b <= words_a:
+        added = words_a - words_b
+    else:
+        return False
+    return not added & NEGATIONS
+
+
+def cluster_headlines(headlines, history=None, max_distance=8):
+    """Collapse near-duplicate headlines of each ticker into one representative.
+
+    headlines is {ticker: [Headline]}; history is {ticker: [ScoredHeadline]}
+    from earlier cycles. Returns (clustered, duplicates, merged):
+
+    clustered  {ticker: [Headline]} with one per cluster, in first-seen
+               order: the cluster's first headline, with `sources`
+               (distinct, in order) and `cluster_size` covering the cluster.
+    duplicates {ticker: [Headline]} folded into a representative or into an
+               earlier cycle's result; they are not classified but should
+               be marked seen.
+    merged     {ticker: [ScoredHeadline]} earlier results that absorbed a
+               new headline. Their `sources` and `cluster_size` are updated
+               in place and should be stored again.
+
+    A negative max_distance disables clustering (every headline is its own
+    cluster).
+    """
+    history = history or {}
+    clustered = {}
+    duplicates = {}
+    merged = {}
+    for ticker, items in headlines.items():
+        if max_distance < 0:
+            clustered[ticker] = list(items)
+            continue
+        known = [(simhash(r.headline), words(r.headline), r) for r in history.get(ticker, [])]
+        # One [fingerprint, words, first item, sources, size] per cluster
+        clusters = []
+        folded = []
+        for item in items:
+            fingerprint = simhash(item.headline)
+            item_words = words(item.headline)
+            for other, other_words, result in known:
+                if distance(fingerprint, other) <= max_distance and same_story(item_words, other_words):
+                    result.sources = _merge_sources(result.all_sources(), item.all_sources())
+                    result.cluster_size += item.cluster_size
+                    if not any(r is result for r in merged.get(ticker, [])):
+                        merged.setdefault(ticker, []).append(result)
+                    folded.append(item)
+                    break
+            else:
+                for cluster in clusters:
+                    if distance(fingerprint, cluster[0]) <= max_distance and same_story(item_words, cluster[1]):
+                        cluster[3] = _merge_sources(cluster[3], item.all_sources())
+                        cluster[4] += item.cluster_size
+                        folded.append(item)
+                        break
+                else:
+                    clusters.append([fingerprint, item_words, item, tuple(item.all_sources()), item.cluster_size])
+        clustered[ticker] = [
+            item if size == item.cluster_size else dataclasses.replace(item, sources=sources, cluster_size=size)
+            for _, _, item, sources, size in clusters
+        ]
+        if folded:
+            duplicates[ticker] = folded
+    return clustered, duplicates, merged
+
+
+def _merge_sources(sources, more):
+    """sources followed by the ones in more it lacks, as a tuple."""
+    return tuple(sources) + tuple(source for source in dict.fromkeys(more) if source not in sources)
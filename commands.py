@@ -0,0 +1,301 @@
+"""Telegram command dispatch: one getUpdates long-poll loop with pluggable handlers.
+
+main.py and telegram_bot_runner.py both build a CommandRouter; a lock file
+makes sure only one process polls at a time, and the update offset is kept
+on disk so a restart neither replays nor skips commands. main.py's router
+has priority: it holds a second lock for its lifetime, and a router
+without priority (the /clear-only runner) stops polling when it sees it.
+"""
+import html
+import json
+import logging
+import os
+import time
+
+import requests
+
+from config import STATE_DIR, TELEGRAM_API_URL
+from rate_limit import backoff_delay
+from telegram_bot import TELEGRAM_BOT_TOKEN, edit_telegram_message, send_telegram_message, handle_clear_command
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run a single poller by hand
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+OFFSET_PATH = os.path.join(STATE_DIR, "telegram_offset.json")
+LOCK_PATH = os.path.join(STATE_DIR, "telegram_poller.lock")
+PRIORITY_LOCK_PATH = os.path.join(STATE_DIR, "telegram_poller.priority.lock")
+# Seconds Telegram holds a getUpdates call open while waiting for a message
+POLL_TIMEOUT = 30
+# Results listed by /latest
+LATEST_LIMIT = 5
+# Minimum seconds between edits of the /clear progress message
+CLEAR_PROGRESS_INTERVAL = 5
+
+
+class CommandRouter:
+    """Long-poll getUpdates and dispatch "/command args" messages to handlers.
+
+    A handler is called as handler(args) with the text after the command
+    and returns the reply text, or None to send nothing.
+    """
+
+    def __init__(self, token=TELEGRAM_BOT_TOKEN, offset_path=OFFSET_PATH, lock_path=LOCK_PATH,
+                 poll_timeout=POLL_TIMEOUT, reply=send_telegram_message,
+                 priority=False, priority_lock_path=PRIORITY_LOCK_PATH):
+        self.token = token
+        self.offset_path = offset_path
+        self.lock_path = lock_path
+        self.priority = priority
+        self.priority_lock_path = priority_lock_path
+        self._priority_file = None
+        self.poll_timeout = poll_timeout
+        self.reply = reply
+        self.handlers = {}
+        self.offset = self._load_offset()
+        self.session = requests.Session()
+        self._lock_file = None
+
+    def register(self, command, handler):
+        self.handlers[command.lower()] = handler
+
+    def _load_offset(self):
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                return int(json.load(f)["offset"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("[Commands] Ignoring unreadable update offset: %s", e)
+            return None
+
+    def _save_offset(self):
+        try:
+            os.makedirs(os.path.dirname(self.offset_path), exist_ok=True)
+            tmp_path = self.offset_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"offset": self.offset}, f)
+            os.replace(tmp_path, self.offset_path)
+        except Exception as e:
+            logger.error("[Commands] Failed to save update offset: %s", e)
+
+    def acquire_lock(self):
+        """Take the poller lock without blocking; False if another process holds it."""
+        if fcntl is None:
+            return True
+        self._lock_file = _try_lock(self.lock_path)
+        return self._lock_file is not None
+
+    def release_lock(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def priority_claimed(self):
+        """True when a router with priority (main.py) is running in another process."""
+        if fcntl is None or self.priority:
+            return False
+        lock_file = _try_lock(self.priority_lock_path)
+        if lock_file is None:
+            return True
+        lock_file.close()
+        return False
+
+    def _acquire_with_priority(self):
+        """Claim priority, then wait for a router without it to hand over the poller lock."""
+        if fcntl is not None:
+            self._priority_file = _try_lock(self.priority_lock_path)
+        # The other router notices between long polls
+        deadline = time.monotonic() + self.poll_timeout + 15
+        while not self.acquire_lock():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(1)
+        return True
+
+    def dispatch(self, text):
+        """Run the handler for one message text; returns True if it was a known command."""
+        parts = text.strip().split(maxsplit=1)
+        if not parts or not parts[0].startswith("/"):
+            return False
+        # "/latest@MyBot TSLA" in group chats
+        command = parts[0].split("@", 1)[0].lower()
+        handler = self.handlers.get(command)
+        if handler is None:
+            return False
+        args = parts[1].strip() if len(parts) > 1 else ""
+        try:
+            reply = handler(args)
+        except Exception as e:
+            logger.error("[Commands] %s failed: %s", command, e)
+            reply = f"{command} failed: {html.escape(str(e))}"
+        if reply:
+            self.reply(reply)
+        return True
+
+    def poll_once(self):
+        """One getUpdates long poll; dispatches what arrived and returns the update count."""
+        url = f"{TELEGRAM_API_URL}/bot{self.token}/getUpdates"
+        params = {"timeout": self.poll_timeout, "allowed_updates": json.dumps(["message"])}
+        if self.offset is not None:
+            params["offset"] = self.offset
+        resp = self.session.get(url, params=params, timeout=self.poll_timeout + 10)
+        resp.raise_for_status()
+        updates = resp.json().get("result", [])
+        if not updates:
+            return 0
+        # Saved before dispatching: a crash mid-command must not replay /clear or /fetch
+        self.offset = updates[-1]["update_id"] + 1
+        self._save_offset()
+        for update in updates:
+            text = (update.get("message") or {}).get("text", "")
+            if text:
+                self.dispatch(text)
+        return len(updates)
+
+    def run_forever(self):
+        """Poll until the process exits, or until a router with priority takes over.
+
+        Without priority, returns at once if another process holds the lock.
+        With priority, waits for a router without it to step aside and logs
+        an error if the lock never frees up (e.g. a second main.py).
+        """
+        if self.priority:
+            if not self._acquire_with_priority():
+                logger.error(
+                    "[Commands] Another process keeps the poller lock (%s); commands (%s) will NOT be answered.",
+                    self.lock_path, ", ".join(sorted(self.handlers)),
+                )
+                return
+        elif self.priority_claimed() or not self.acquire_lock():
+            logger.warning("[Commands] Another process is already polling for commands; not polling here.")
+            return
+        # The previous poller may have moved the offset since this router was built
+        self.offset = self._load_offset()
+        logger.info("[Commands] Polling for commands: %s", ", ".join(sorted(self.handlers)))
+        failures = 0
+        while True:
+            if self.priority_claimed():
+                self.release_lock()
+                logger.info("[Commands] main.py is polling for commands now; stopping here.")
+                return
+            try:
+                self.poll_once()
+                failures = 0
+            except Exception as e:
+                delay = backoff_delay(failures, base=2.0, cap=60.0)
+                failures += 1
+                logger.error("[Commands] getUpdates failed: %s; retrying in %.1fs", e, delay)
+                time.sleep(delay)
+
+
+def _try_lock(path):
+    """Open path and take an exclusive flock without blocking; the open file, or None if it is held."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def clear_handler(args):
+    """/clear deletes the tracked messages, keeping one progress message up to date."""
+    status = {"message_id": None, "edited": 0.0}
+
+    def progress(done, total):
+        text = f"Clearing messages: {done}/{total}"
+        if status["message_id"] is None:
+            # Sent after the IDs were read, so this message survives the clear
+            status["message_id"] = send_telegram_message(text)
+            status["edited"] = time.monotonic()
+        elif done < total and time.monotonic() - status["edited"] >= CLEAR_PROGRESS_INTERVAL:
+            edit_telegram_message(status["message_id"], text)
+            status["edited"] = time.monotonic()
+
+    deleted = handle_clear_command(progress)
+    return f"Cleared {deleted} messages."
+
+
+FETCH_REPLIES = {
+    "started": "Manual fetch triggered!",
+    "joined": "A fetch is already running; its results will be shared.",
+    "queued": "A follow-up fetch is queued after the current run.",
+    "joined_queued": "A follow-up fetch is already queued.",
+}
+
+
+def make_fetch_handler(coordinator):
+    """/fetch triggers (or joins) a full cycle; /fetch next queues one follow-up."""
+    def handle(args):
+        run, action = coordinator.trigger("/fetch", follow_up=args.lower() == "next", all_sources=True)
+        if action in ("started", "queued"):
+            # One completion report per run, however many /fetch commands it absorbed
+            def report(future):
+                if future.exception() is not None:
+                    send_telegram_message(f"Fetch failed: {html.escape(str(future.exception()))}")
+                else:
+                    result = future.result() or {}
+                    send_telegram_message(
+                        f"Fetch finished in {run.duration():.0f}s: {result.get('new_count', 0)} new headlines."
+                    )
+            run.future.add_done_callback(report)
+        return f"{FETCH_REPLIES[action]} {coordinator.status()}"
+    return handle
+
+
+def make_status_handler(coordinator, scheduler=None):
+    def handle(args):
+        status = coordinator.status()
+        if scheduler is not None:
+            wait = max(0, scheduler.next_due() - time.time())
+            status += f" Next scheduled poll in {wait:.0f}s."
+        return status
+    return handle
+
+
+def format_latest(ticker, results, limit=LATEST_LIMIT):
+    """Compact HTML listing of a ticker's newest results."""
+    items = sorted(results, key=lambda r: r.date, reverse=True)[:limit]
+    lines = [f"<b>{html.escape(ticker)}</b> - latest {len(items)} of {len(results)}:"]
+    for r in items:
+        lines.append(
+            f"{r.flag} {html.escape(r.headline)} "
+            f"({html.escape(r.source)}, {html.escape(r.date)}) {r.confidence}/10"
+        )
+    return "\n".join(lines)
+
+
+def make_latest_handler(coordinator):
+    """/latest <ticker> answers from the last finished cycle; it never starts a fetch."""
+    def handle(args):
+        ticker = args.strip().upper()
+        if not ticker:
+            return "Usage: /latest &lt;ticker&gt;"
+        last = coordinator.last_result
+        if last is None:
+            return "No results yet; the first cycle has not finished."
+        results = last["results"].get(ticker)
+        if not results:
+            return f"No recent headlines for {html.escape(ticker)}."
+        return format_latest(ticker, results)
+    return handle
+
+
+def build_router(coordinator=None, scheduler=None):
+    """Router with /clear, plus /fetch, /status and /latest when a coordinator is given.
+
+    A router with a coordinator (main.py) has priority over the /clear-only one.
+    """
+    router = CommandRouter(priority=coordinator is not None)
+    router.register("/clear", clear_handler)
+    if coordinator is not None:
+        router.register("/fetch", make_fetch_handler(coordinator))
+        router.register("/status", make_status_handler(coordinator, scheduler))
+        router.register("/latest", make_latest_handler(coordinator))
+    return router
@@ -8,3 +8,68 @@ SHEET_NAME = os.getenv("SHEET_NAME", "")
 # Load tickers from config/tickers.json
 with open(os.path.join(os.path.dirname(__file__), "config", "tickers.json"), "r") as f:
     TICKERS = json.load(f)
+
+# News sources ({name: url or {"url", "connect_timeout", "read_timeout"}})
+SOURCES_FILE = os.getenv("SOURCES_FILE", os.path.join(os.path.dirname(__file__), "config", "sources.json"))
+
+# Scraper settings: concurrent source fetches and default (connect, read) timeouts in seconds
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+FETCH_CONNECT_TIMEOUT = float(os.getenv("FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_READ_TIMEOUT = float(os.getenv("FETCH_READ_TIMEOUT", "15"))
+
+# Local state (HTTP cache, stores) lives here; created on first use
+STATE_DIR = os.getenv("STATE_DIR", os.path.join(os.path.dirname(__file__), "state"))
+
+# GPT classification
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+CLASSIFY_CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFY_CACHE_MAX_ENTRIES", "50000"))
+CLASSIFY_CACHE_MAX_AGE_HOURS = float(os.getenv("CLASSIFY_CACHE_MAX_AGE_HOURS", "168"))
+# Token budget (prompt + reserved completion) for one batched classification request
+CLASSIFY_BATCH_TOKENS = int(os.getenv("CLASSIFY_BATCH_TOKENS", "4000"))
+# Concurrent classification: worker threads, OpenAI rate limits and retry attempts per request
+CLASSIFY_MAX_WORKERS = int(os.getenv("CLASSIFY_MAX_WORKERS", "4"))
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "30000"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# Processed headlines are remembered (and carried forward to the Sheet) for this long
+SEEN_TTL_HOURS = float(os.getenv("SEEN_TTL_HOURS", "48"))
+
+# JMoney "Confirmed" snapshot is re-read when the spreadsheet changes or after this many minutes
+JMONEY_TTL_MINUTES = float(os.getenv("JMONEY_TTL_MINUTES", "60"))
+
+# Telegram Bot API base URL (overridable to point at a local stand-in)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+
+# Telegram outbound queue: messages per minute to the chat, and digest mode (pack several cards per message)
+TELEGRAM_MESSAGES_PER_MINUTE = int(os.getenv("TELEGRAM_MESSAGES_PER_MINUTE", "20"))
+TELEGRAM_DIGEST = os.getenv("TELEGRAM_DIGEST", "").lower() in ("1", "true", "yes")
+# Bots can only delete their messages for 48 hours; older tracked IDs are dropped
+TELEGRAM_DELETE_MAX_AGE_HOURS = float(os.getenv("TELEGRAM_DELETE_MAX_AGE_HOURS", "48"))
+
+# Logging: level for console and file, and size-based rotation of the log file
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "output.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+# Adaptive polling: each source's interval follows its observed rate of new headlines,
+# within these bounds (seconds). POLL_REQUESTS_PER_HOUR is the total budget shared by all
+# sources; 0 keeps it at one request per source per hour.
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "300"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "7200"))
+POLL_REQUESTS_PER_HOUR = float(os.getenv("POLL_REQUESTS_PER_HOUR", "0"))
+
+# Prometheus-style /metrics endpoint (metrics.py); port 0 disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# Record/replay archive (archive.py, main.py --record / --replay)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(STATE_DIR, "archive"))
+
+# Near-duplicate clustering: max differing SimHash bits (of 64) between headlines of one story; -1 disables.
+# Matches are also confirmed by word containment (see clustering.py), so this only bounds how many words may be added
+CLUSTER_MAX_DISTANCE = int(os.getenv("CLUSTER_MAX_DISTANCE", "8"))
+
+# --once: seconds to wait for queued Telegram alerts before exiting
+ONCE_FLUSH_TIMEOUT = float(os.getenv("ONCE_FLUSH_TIMEOUT", "600"))
@@ -0,0 +1,137 @@
+"""Single-flight coordination of pipeline cycles.
+
+Scheduled cycles and /fetch commands all go through one RunCoordinator.
+A trigger that arrives while a cycle is running joins that cycle and gets
+its result instead of starting another one, provided that cycle does
+everything the trigger asked for; otherwise it queues a follow-up. At most
+one follow-up cycle can be queued behind the running one.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Run:
+    """One cycle: who asked for it, when it ran, and a Future with its result."""
+
+    def __init__(self, reason, kwargs):
+        self.reason = reason
+        self.kwargs = kwargs
+        self.future = Future()
+        self.requested = 1
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def duration(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class RunCoordinator:
+    """Run `target(**kwargs)` so that at most one cycle is in flight.
+
+    trigger() returns (run, action) where action is one of:
+      "started" - nothing was running, a new cycle started
+      "joined"  - merged into the cycle already running
+      "queued"  - a follow-up was queued behind the running cycle
+      "joined_queued" - merged into the follow-up that was already queued
+    Every requester of a run shares run.future.
+
+    covers(run_kwargs, wanted_kwargs) decides whether a run started with
+    run_kwargs satisfies a trigger with wanted_kwargs (default: equal
+    kwargs). A trigger the running cycle does not cover is queued instead
+    of joined; one the queued follow-up does not cover widens its kwargs.
+    """
+
+    def __init__(self, target, covers=None):
+        self.target = target
+        self.covers = covers or (lambda run_kwargs, wanted_kwargs: run_kwargs == wanted_kwargs)
+        self._lock = threading.Lock()
+        self.current = None
+        self.queued = None
+        self.last_run = None
+        self.last_result = None
+
+    def trigger(self, reason, follow_up=False, **kwargs):
+        with self._lock:
+            if self.current is None:
+                run = self.current = Run(reason, kwargs)
+                action = "started"
+            elif not follow_up and self.covers(self.current.kwargs, kwargs):
+                run = self.current
+                run.requested += 1
+                action = "joined"
+            elif self.queued is None:
+                run = self.queued = Run(reason, kwargs)
+                action = "queued"
+            else:
+                run = self.queued
+                run.requested += 1
+                if not self.covers(run.kwargs, kwargs):
+                    run.kwargs = {**run.kwargs, **kwargs}
+                action = "joined_queued"
+        if action == "started":
+            self._start(run)
+        logger.info("[Coordinator] %s trigger %s run (%s)", reason, action.replace("_", " "), run.reason)
+        return run, action
+
+    def run(self, reason, **kwargs):
+        """Trigger a cycle (or join the running one) and wait for its result."""
+        run, _ = self.trigger(reason, **kwargs)
+        return run.future.result()
+
+    def _start(self, run):
+        threading.Thread(target=self._execute, args=(run,), name=f"cycle-{run.reason}", daemon=True).start()
+
+    def _execute(self, run):
+        run.started_at = time.time()
+        result = error = None
+        try:
+            result = self.target(**run.kwargs)
+        except Exception as e:
+            error = e
+            metrics.ERRORS.inc(component="cycle")
+            logger.exception("[Coordinator] %s run failed", run.reason)
+        run.finished_at = time.time()
+        run.error = error
+        with self._lock:
+            self.last_run = run
+            if error is None and result is not None:
+                self.last_result = result
+            # Promote the follow-up before resolving, so late triggers join it rather than a finished run
+            next_run = self.current = self.queued
+            self.queued = None
+        if next_run is not None:
+            self._start(next_run)
+        if error is None:
+            run.future.set_result(result)
+        else:
+            run.future.set_exception(error)
+
+    def status(self):
+        """One-line description of the running, queued and last finished cycles."""
+        with self._lock:
+            current, queued, last = self.current, self.queued, self.last_run
+        parts = []
+        if current is not None:
+            parts.append(
+                f"Running: {current.reason} run for {current.duration():.0f}s "
+                f"({current.requested} request{'s' if current.requested != 1 else ''})."
+            )
+        else:
+            parts.append("Idle.")
+        if queued is not None:
+            parts.append(f"Follow-up queued by {queued.reason}.")
+        if last is not None:
+            ago = time.time() - last.finished_at
+            outcome = f"failed: {last.error}" if last.error else "succeeded"
+            parts.append(f"Last run ({last.reason}) {outcome} {ago:.0f}s ago after {last.duration():.0f}s.")
+        return " ".join(parts)
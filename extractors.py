@@ -0,0 +1,145 @@
+import datetime
+import logging
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Strings shorter than this are navigation/boilerplate, not headlines
+MIN_HEADLINE_WORDS = 4
+
+
+def parse_timestamp(value):
+    """Normalize an HTML datetime value to the 'YYYY-MM-DDTHH:MM:SSZ' UTC form, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if value.isdigit():
+            seconds = int(value)
+            if seconds > 10**11:  # milliseconds
+                seconds //= 1000
+            dt = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc)
+        else:
+            dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
+
+
+class Extractor:
+    """Pull headlines out of one site's markup.
+
+    Only the elements matched by `containers` (a SoupStrainer) are built by
+    the parser. Inside each container the first `headline` match (or the
+    container itself when headline is None) supplies the text and the first
+    `timestamp` match supplies the publish time.
+    """
+
+    def __init__(self, containers, headline=None, timestamp="time[datetime]",
+                 timestamp_attrs=("datetime", "data-timestamp")):
+        self.containers = containers
+        self.headline = headline
+        self.timestamp = timestamp
+        self.timestamp_attrs = timestamp_attrs
+
+    def extract(self, html):
+        """Return [(headline text, ISO publish time or None)] in page order."""
+        soup = BeautifulSoup(html, PARSER, parse_only=self.containers)
+        results = []
+        for container in soup.find_all(self.containers):
+            node = container.select_one(self.headline) if self.headline else container
+            if node is None:
+                continue
+            text = node.get_text(" ", strip=True)
+            if len(text.split()) < MIN_HEADLINE_WORDS:
+                continue
+            results.append((text, self._published(container)))
+        return results
+
+    def _published(self, container):
+        if not self.timestamp:
+            return None
+        node = container.select_one(self.timestamp)
+        if node is None:
+            return None
+        for attr in self.timestamp_attrs:
+            published = parse_timestamp(node.get(attr))
+            if published:
+                return published
+        return None
+
+
+# Used for sources without a registered extractor, and when a site's
+# extractor comes back empty (usually a redesign).
+GENERIC_EXTRACTOR = Extractor(SoupStrainer(["h3", "a", "p"]), timestamp=None)
+
+EXTRACTORS = {}
+
+
+def register_extractor(name, extractor):
+    """Register the extractor for a source name from config/sources.json."""
+    EXTRACTORS[name] = extractor
+
+
+def get_extractor(name):
+    return EXTRACTORS.get(name, GENERIC_EXTRACTOR)
+
+
+def extract_headlines(name, html):
+    """Extract (text, published) pairs for a source, falling back to the generic extractor."""
+    extractor = get_extractor(name)
+    headlines = extractor.extract(html)
+    if not headlines and extractor is not GENERIC_EXTRACTOR:
+        logger.warning("[%s] Source extractor found no headlines, using generic extractor.", name)
+        headlines = GENERIC_EXTRACTOR.extract(html)
+    return headlines
+
+
+_yahoo = Extractor(SoupStrainer("li", class_=re.compile(r"stream-item|story-item")), headline="h3")
+register_extractor("YahooFinance", _yahoo)
+register_extractor("Yahoo", _yahoo)
+register_extractor("MarketWatch", Extractor(
+    SoupStrainer("div", class_=re.compile(r"article__content")),
+    headline="h3 a, h3",
+))
+register_extractor("Reuters", Extractor(
+    SoupStrainer(attrs={"data-testid": re.compile(r"StoryCard")}),
+    headline='[data-testid="Heading"], h3',
+))
+register_extractor("Bloomberg", Extractor(SoupStrainer("article"), headline="h3, a"))
+register_extractor("Investing", Extractor(
+    SoupStrainer("article"),
+    headline='a[data-test="article-title-link"], a.title, a',
+))
+register_extractor("Finviz", Extractor(
+    SoupStrainer("tr", class_=re.compile(r"news_table-row|nn")),
+    headline="a.nn-tab-link, a",
+    timestamp=None,
+))
+register_extractor("GlobeNewswire", Extractor(
+    SoupStrainer("div", class_=re.compile(r"mainLink|pagging-list-item")),
+    headline="a",
+))
+register_extractor("CNBC", Extractor(
+    SoupStrainer("div", class_=re.compile(r"Card-titleContainer|LatestNews-headlineWrapper")),
+    headline="a",
+))
+register_extractor("FXStreet", Extractor(SoupStrainer("article"), headline="h4 a, h3 a, h2 a"))
+register_extractor("Business Insider", Extractor(
+    SoupStrainer("div", class_=re.compile(r"latest-news__story")),
+    headline="a.news-link, a",
+))
+register_extractor("Financial Times", Extractor(
+    SoupStrainer("div", class_=re.compile(r"o-teaser\b")),
+    headline="a.js-teaser-heading-link, .o-teaser__heading",
+))
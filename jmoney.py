@@ -0,0 +1,115 @@
+"""Local snapshot of the JMoney 'Confirmed' signals, indexed by ticker.
+
+The worksheet is only re-read when the spreadsheet's Drive modifiedTime
+changes or the snapshot is older than JMONEY_TTL_MINUTES. Snapshots are
+persisted to disk so a restart comes up warm, and the last good snapshot
+keeps being used while the sheet cannot be reached.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import metrics
+import sheets_client
+from config import STATE_DIR, JMONEY_TTL_MINUTES
+
+logger = logging.getLogger(__name__)
+
+JMONEY_SPREADSHEET = "Jmoney_Engine"
+JMONEY_WORKSHEET = "Confirmed"
+SNAPSHOT_PATH = os.path.join(STATE_DIR, "jmoney_snapshot.json")
+
+_snapshot = None
+# False while get_jmoney_signals() is answering {} because the sheet failed and no snapshot exists
+_available = True
+_lock = threading.Lock()
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("[JMoney] Ignoring unreadable snapshot: %s", e)
+        return None
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("[JMoney] Failed to write snapshot: %s", e)
+
+
+def index_rows(rows):
+    """Index Confirmed rows by ticker (later rows win, as before)."""
+    signals = {}
+    for row in rows:
+        ticker = row.get("ticker")
+        if ticker:
+            signals[ticker] = row
+    return signals
+
+
+def _modified_time(spreadsheet):
+    try:
+        with metrics.SHEETS_CALL_SECONDS.time(call="get_lastUpdateTime"):
+            return spreadsheet.get_lastUpdateTime()
+    except Exception as e:
+        logger.warning("[JMoney] Could not read spreadsheet modified time: %s", e)
+        return None
+
+
+def signals_available():
+    """False when the last get_jmoney_signals() result was the empty error fallback, not real signals."""
+    with _lock:
+        return _available
+
+
+def get_jmoney_signals(force=False):
+    """Return {ticker: row} from the Confirmed tab, refreshing the snapshot only when needed.
+
+    When the sheet cannot be read and there is no snapshot yet, returns {}
+    and signals_available() is False until a later call succeeds.
+    """
+    global _snapshot, _available
+    with _lock:
+        _available = True
+        if _snapshot is None:
+            _snapshot = load_snapshot()
+        snapshot = _snapshot
+        try:
+            expired = (
+                force or snapshot is None
+                or time.time() - snapshot.get("fetched_at", 0) > JMONEY_TTL_MINUTES * 60
+            )
+            spreadsheet = sheets_client.get_spreadsheet(JMONEY_SPREADSHEET)
+            modified = _modified_time(spreadsheet)
+            if not expired and (modified is None or modified == snapshot.get("modified")):
+                return snapshot["signals"]
+            worksheet = sheets_client.get_worksheet(JMONEY_SPREADSHEET, JMONEY_WORKSHEET)
+            with metrics.SHEETS_CALL_SECONDS.time(call="get_all_records"):
+                rows = worksheet.get_all_records()
+            snapshot = {"fetched_at": time.time(), "modified": modified, "signals": index_rows(rows)}
+            _snapshot = snapshot
+            save_snapshot(snapshot)
+            logger.info("[JMoney] Refreshed snapshot: %d confirmed tickers.", len(snapshot["signals"]))
+            return snapshot["signals"]
+        except Exception as e:
+            sheets_client.forget_handles()
+            metrics.ERRORS.inc(component="jmoney")
+            if snapshot is None:
+                logger.error("[JMoney Sheet Error] %s (no snapshot available, treating all tickers as unconfirmed)", e)
+                _available = False
+                return {}
+            age_minutes = (time.time() - snapshot.get("fetched_at", 0)) / 60
+            logger.warning("[JMoney Sheet Error] %s (using last good snapshot from %.0f minutes ago)", e, age_minutes)
+            return snapshot["signals"]
@@ -0,0 +1,50 @@
+"""Non-blocking, rotating logging for the news pipeline.
+
+Callers only hand records to a QueueHandler; a QueueListener thread does
+the console and file I/O, so logging never waits on disk in the hot loop.
+The file rotates by size. Per-headline "[STEP n]" messages are DEBUG and
+skipped cheaply at the default INFO level.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+from config import LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL, log_file=LOG_FILE):
+    """Route the root logger through a background queue to the console and a rotating file.
+
+    Safe to call more than once; only the first call installs handlers.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    formatter = logging.Formatter(LOG_FORMAT)
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    handlers = [console]
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    # Third-party HTTP clients are chatty at DEBUG
+    for name in ("urllib3", "httpx", "httpcore", "openai"):
+        logging.getLogger(name).setLevel(max(logging.getLogger().level, logging.INFO))
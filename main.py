@@ -1,310 +1,376 @@
+import argparse
 import os
 import sys
 import threading
 import time
-import json
-import glob
+import math
 import datetime
+import logging
 
 from dotenv import load_dotenv
 load_dotenv()
 
-import requests
-from config import TICKERS
-from scrape import fetch_headlines
-from classify import classify_headline
-from sheet import upload_to_sheet
-from telegram_bot import send_telegram_message, handle_clear_command
-
-# Load scoring parameters from config/scoring.json
-scoring_path = os.path.join(os.path.dirname(__file__), "config", "scoring.json")
-with open(scoring_path, "r") as f:
-    SCORING_PARAMS = json.load(f)
-
-# Set GOOGLE_APPLICATION_CREDENTIALS from .env if present, else print a warning
-gsa_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-if gsa_path and os.path.exists(gsa_path):
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = gsa_path
-else:
-    print("Warning: GOOGLE_APPLICATION_CREDENTIALS not set or file not found:", gsa_path)
-
-
-# Log outputs to terminal and output file
-class Tee:
-    def __init__(self, *files):
-        self.files = files
-    def write(self, obj):
-        for f in self.files:
-            f.write(obj)
-            f.flush()
-    def flush(self):
-        for f in self.files:
-            f.flush()
-
-logfile = open("output.log", "a", encoding="utf-8", buffering=1)
-sys.stdout = Tee(sys.__stdout__, logfile)
-sys.stderr = Tee(sys.__stderr__, logfile)
-
-
-def fetch_and_process(loop_count=None):
-    print("[STEP 1] Run: Starting new cycle: fetching and processing headlines...")
+# Everything heavier than config and logging is imported where it is first used,
+# so `--once` and `--replay` start fast (benchmarks/bench_import.py keeps this in check)
+from log_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def check_credentials():
+    # Set GOOGLE_APPLICATION_CREDENTIALS from .env if present, else log a warning
+    gsa_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    if gsa_path and os.path.exists(gsa_path):
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = gsa_path
+    else:
+        logger.warning("GOOGLE_APPLICATION_CREDENTIALS not set or file not found: %s", gsa_path)
+
+
+# Guards the lazily built singletons below: the command poller thread and the main loop both ask for them at startup
+_singletons_lock = threading.RLock()
+_seen_store = None
+
+def get_seen_store():
+    global _seen_store
+    with _singletons_lock:
+        if _seen_store is None:
+            from config import STATE_DIR, SEEN_TTL_HOURS
+            from seen_store import SeenStore
+            _seen_store = SeenStore(os.path.join(STATE_DIR, "seen_headlines.sqlite3"), ttl=SEEN_TTL_HOURS * 3600)
+    return _seen_store
+
+
+_scheduler = None
+
+def get_scheduler():
+    global _scheduler
+    with _singletons_lock:
+        if _scheduler is None:
+            from config import STATE_DIR, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_REQUESTS_PER_HOUR
+            from scheduler import PollScheduler
+            from scrape import load_sources
+            _scheduler = PollScheduler(
+                load_sources(), os.path.join(STATE_DIR, "poll_schedule.json"),
+                budget=POLL_REQUESTS_PER_HOUR, min_interval=POLL_MIN_INTERVAL, max_interval=POLL_MAX_INTERVAL,
+            )
+    return _scheduler
+
+
+def requeue_confirmed(new_headlines, carried, tickers):
+    """Move carried results of newly JMoney-confirmed tickers back into this cycle's input.
+
+    Their headlines are re-classified with the JMoney context and re-scored
+    now instead of waiting for a source to publish something new.
+    """
+    for ticker in tickers:
+        items = [r.to_headline() for r in carried.pop(ticker, [])]
+        if items:
+            new_headlines[ticker] = items + new_headlines.get(ticker, [])
+
+
+def cluster_new(new_headlines, carried):
+    """Fold near-duplicate headlines into one per story (see clustering.py).
+
+    Returns (clustered, duplicates, merged) as cluster_headlines() does.
+    """
+    from clustering import cluster_headlines
+    from config import CLUSTER_MAX_DISTANCE
+    clustered, duplicates, merged = cluster_headlines(new_headlines, carried, CLUSTER_MAX_DISTANCE)
+    folded = sum(len(items) for items in duplicates.values())
+    if folded:
+        logger.info(
+            "[Cluster] Folded %d near-duplicate headlines into earlier stories (%d from earlier cycles).",
+            folded, sum(len(items) for items in merged.values()),
+        )
+    return clustered, duplicates, merged
+
+
+# Set by --record: every cycle's inputs go to this archive.Archive
+_archive = None
+
+
+def headline_keys(headlines):
+    from seen_store import normalize_headline
+    return {
+        (ticker, normalize_headline(item.headline), item.source)
+        for ticker, items in headlines.items()
+        for item in items
+    }
+
+
+def record_cycle_inputs(archive, headlines, new_headlines, carried, jmoney_details, confirmed):
+    """Store what a replay needs besides pages and completions to rerun this cycle exactly."""
+    from records import to_dicts
+    archive.record_value("seen", sorted(headline_keys(headlines) - headline_keys(new_headlines)))
+    archive.record_value("carried", to_dicts(carried))
+    archive.record_value("jmoney", jmoney_details)
+    archive.record_value("confirmed", sorted(confirmed))
+
+
+def replay_cycle(archive, cycle_id="latest"):
+    """Rerun a recorded cycle from the archive: no network, no caches, nothing sent.
+
+    Pages and GPT replies come from the archive. The classification cache
+    is an in-memory one seeded with the recorded classifications, and the
+    page cache is skipped, so parser and scoring changes take effect;
+    headlines without a recording fall back to the recorded prompt replies,
+    then to "No News". Results and the Telegram cards that would have been
+    sent are written to replays/<cycle>.json.
+    """
+    from archive import ReplayClient, ReplaySession
+    from classify import set_cache, set_client
+    from classify_cache import ClassificationCache
+    from pipeline import run_pipeline
+    from records import from_dicts, parse_date, to_dicts
+    from scrape import fetch_headlines, load_sources
+    manifest = archive.load_cycle(cycle_id)
+    logger.info("[Archive] Replaying cycle %s", manifest["cycle"])
+    set_client(ReplayClient(archive, manifest))
+    cache = ClassificationCache(":memory:")
+    for key, result in archive.get_json(manifest["classifications"]).items():
+        cache.set(key, result)
+    set_cache(cache)
+
+    tickers = archive.get_json(manifest["tickers"])
+    sources = [name for name, source in load_sources().items() if source["url"] in manifest["sources"]]
+    headlines = fetch_headlines(
+        tickers, sources=sources, session=ReplaySession(archive, manifest), use_page_cache=False
+    )
+    seen = {tuple(key) for key in archive.get_json(manifest["seen"])}
+    new_headlines = {
+        ticker: [item for item in items if next(iter(headline_keys({ticker: [item]}))) not in seen]
+        for ticker, items in headlines.items()
+    }
+    carried = from_dicts(archive.get_json(manifest["carried"]))
+    requeue_confirmed(new_headlines, carried, archive.get_json(manifest["confirmed"]))
+    new_headlines, _, _ = cluster_new(new_headlines, carried)
+    cards = []
+    results, timings = run_pipeline(
+        new_headlines, archive.get_json(manifest["jmoney"]), send=cards.append,
+        now=parse_date(manifest["started_at"]), history=carried,
+    )
+
+    # Compare with what the recorded cycle produced
+    recorded = {
+        (r["ticker"], r["headline"], r["source"]): (r["flag"], r["confidence"])
+        for items in archive.get_json(manifest["results"]).values() for r in items
+    } if "results" in manifest else {}
+    replayed = {
+        (r.ticker, r.headline, r.source): (r.flag, r.confidence)
+        for items in results.values() for r in items
+    }
+    changed = sorted(key for key in recorded.keys() | replayed.keys() if recorded.get(key) != replayed.get(key))
+    path = archive.save_replay(manifest["cycle"], {
+        "cycle": manifest["cycle"],
+        "timings": timings,
+        "results": to_dicts(results),
+        "telegram": cards,
+        "changed": [list(key) for key in changed],
+    })
+    logger.info(
+        "[Archive] Replayed %s: %d results, %d differ from the recording. Output: %s",
+        manifest["cycle"], len(replayed), len(changed), path,
+    )
+    return results
+
+
+def fetch_and_process(loop_count=None, all_sources=False):
+    """Run one cycle over the sources that are due (every source if all_sources).
+
+    Returns {"results": {ticker: [result]} as uploaded to the Sheet,
+    "new_count": headlines processed this cycle, "finished_at": epoch},
+    or None when no source was due.
+    """
+    import metrics
+    started = time.perf_counter()
+    logger.info("[STEP 1] Run: Starting new cycle: fetching and processing headlines...")
     if loop_count:
-        print(f"\n--- Run #{loop_count} ---")
-    print("[STEP 2] Fetching news for all tickers...")
+        logger.info("--- Run #%s ---", loop_count)
     from config import TICKERS
     from scrape import fetch_headlines
-    from classify import classify_headline
+    from pipeline import run_pipeline
+    from records import to_dicts
     from sheet import upload_to_sheet
-    from telegram_bot import send_telegram_message, handle_clear_command
-    headlines = fetch_headlines(TICKERS)
-
-    # Load JMoney signals from Google Sheet 'Jmoney_engine'
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
-    from config import GOOGLE_SERVICE_ACCOUNT_JSON
-    jmoney_tickers = set()
-    jmoney_details = {}
+    from telegram_bot import enqueue_message
+    scheduler = get_scheduler()
+    sources = None if all_sources else scheduler.due()
+    if sources == []:
+        logger.info("[Scheduler] No source is due yet.")
+        return None
+    logger.info("[STEP 2] Fetching news for all tickers from %s sources...", "all" if sources is None else len(sources))
+    now = datetime.datetime.utcnow()
+    session = None
+    if _archive is not None:
+        from archive import RecordingSession
+        from scrape import get_session
+        _archive.start_cycle(TICKERS, now)
+        session = RecordingSession(get_session(), _archive)
+    new_counts = {}
+    headlines = fetch_headlines(TICKERS, sources=sources, new_counts=new_counts, session=session)
+    scheduler.record(new_counts)
+
+    # Load JMoney signals from Google Sheet 'Jmoney_engine' (cached snapshot, see jmoney.py)
+    from jmoney import get_jmoney_signals, signals_available
+    jmoney_details = get_jmoney_signals()
+
+    # Only headlines not handled in an earlier cycle are classified and alerted
+    store = get_seen_store()
+    new_headlines, carried = store.split_new(headlines)
+    # The empty fallback of a failed read must not replace the confirmed set, or every
+    # confirmed ticker would count as newly confirmed (and be re-sent) once JMoney is back
+    confirmed = scheduler.update_confirmed(jmoney_details) & set(TICKERS) if signals_available() else set()
+    if _archive is not None:
+        record_cycle_inputs(_archive, headlines, new_headlines, carried, jmoney_details, confirmed)
+    if confirmed:
+        logger.info("[Scheduler] Newly JMoney-confirmed, re-scoring now: %s", ", ".join(sorted(confirmed)))
+        requeue_confirmed(new_headlines, carried, confirmed)
+    new_headlines, duplicates, merged = cluster_new(new_headlines, carried)
+    new_count = sum(len(items) for items in new_headlines.values())
+    carried_count = sum(len(items) for items in carried.values())
+    logger.info("[STEP 3] All headlines fetched. %d new, %d carried forward. Now analyzing and processing...", new_count, carried_count)
+    results, timings = run_pipeline(new_headlines, jmoney_details, send=enqueue_message, now=now, history=carried)
+    store.record(results)
+    store.mark_seen(duplicates)
+    # Earlier results that absorbed a new source this cycle
+    store.record(merged)
+    if _archive is not None:
+        _archive.record_value("results", to_dicts(results))
+        _archive.finish_cycle()
+
+    # The Sheet gets earlier results followed by this cycle's
+    sheet_results = {ticker: carried.get(ticker, []) + results.get(ticker, []) for ticker in headlines}
+    for ticker, items in carried.items():
+        sheet_results.setdefault(ticker, items)
+    logger.info("[STEP 12] Output: Uploading results to Google Sheet...")
+    upload_to_sheet(sheet_results)
+    logger.info("[STEP 13] Output: Results uploaded successfully.")
+    metrics.CYCLE_SECONDS.observe(time.perf_counter() - started)
+    logger.info("[Metrics] Cycle took %.2fs: %s", time.perf_counter() - started, metrics.cycle_summary())
+    return {"results": sheet_results, "new_count": new_count, "finished_at": time.time()}
+
+
+def covers_sources(run_kwargs, wanted_kwargs):
+    """A running cycle serves a trigger unless the trigger wants every source and the run polls only due ones."""
+    return run_kwargs.get("all_sources", False) or not wanted_kwargs.get("all_sources", False)
+
+
+_coordinator = None
+
+def get_coordinator():
+    """The process-wide RunCoordinator; every cycle, scheduled or /fetch, goes through it."""
+    global _coordinator
+    with _singletons_lock:
+        if _coordinator is None:
+            from coordinator import RunCoordinator
+            _coordinator = RunCoordinator(fetch_and_process, covers=covers_sources)
+    return _coordinator
+
+
+def poll_for_commands():
+    from commands import build_router
+    build_router(get_coordinator(), get_scheduler()).run_forever()
+
+# Exit statuses of --once (argparse exits with 2 on bad arguments)
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_ERRORS = 3
+
+
+def run_once(all_sources=False):
+    """Run a single cycle for cron or a job runner and return the process exit status.
+
+    EXIT_OK when the cycle finished cleanly (or no source was due),
+    EXIT_FAILED when it raised, and EXIT_ERRORS when it finished but a
+    component logged errors or the Telegram queue did not drain in time.
+    """
+    import metrics
+    from config import ONCE_FLUSH_TIMEOUT
+    from telegram_bot import flush_messages
+    errors_before = sum(metrics.ERRORS.snapshot().values())
     try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_SERVICE_ACCOUNT_JSON, scope)
-        client = gspread.authorize(creds)
-        sheet = client.open("Jmoney_Engine").worksheet("Confirmed")
-        rows = sheet.get_all_records()
-        for row in rows:
-            ticker = row.get("ticker")
-            if ticker:
-                jmoney_tickers.add(ticker)
-                jmoney_details[ticker] = row
+        get_coordinator().run("once", all_sources=all_sources)
     except Exception as e:
-        print(f"[JMoney Sheet Error] {e}")
+        logger.error("[Once] Cycle failed: %s", e)
+        return EXIT_FAILED
+    # Alerts go out from a background thread; the process must not exit before they are sent
+    if not flush_messages(timeout=ONCE_FLUSH_TIMEOUT):
+        logger.error("[Once] Telegram queue not drained after %.0fs; unsent alerts are lost.", ONCE_FLUSH_TIMEOUT)
+        return EXIT_ERRORS
+    errors = sum(metrics.ERRORS.snapshot().values()) - errors_before
+    if errors:
+        logger.warning("[Once] Cycle finished with %d errors.", errors)
+        return EXIT_ERRORS
+    return EXIT_OK
 
-    print("[STEP 3] All headlines fetched. Now analyzing and processing...")
-    results = {}
-    now = datetime.datetime.utcnow()
-    for ticker, hl_list in headlines.items():
-        print(f"[STEP 4] Processing ticker: {ticker}")
-        # [Analyze] Looping through tickers and headlines for analysis
-        # Volume-based boost: headlines in last 24h
-        recent_headlines = []
-        for item in hl_list:
-            date_str = item.get("date", "")
-            # Try to parse date
-            try:
-                if date_str:
-                    dt = datetime.datetime.fromisoformat(date_str.replace("Z", ""))
-                else:
-                    dt = None
-            except Exception:
-                dt = None
-            if dt and (now - dt).total_seconds() < 86400:
-                recent_headlines.append(item)
-        volume_boost = len(recent_headlines) > 3
-
-        # Macro context: % positive in last 24h
-        macro_positive = 0
-        macro_total = 0
-        macro_sentiments = []
-        for item in recent_headlines:
-            print("[STEP 5] Analyzing macro context for recent headline...")
-            gpt_result = classify_headline(item["headline"])
-            macro_sentiments.append(gpt_result.get("category", "No News"))
-        macro_total = len(macro_sentiments)
-        macro_positive = sum(1 for s in macro_sentiments if s == "Positive Catalyst")
-        macro_ratio = macro_positive / macro_total if macro_total else 0
-
-        results[ticker] = []
-        for item in hl_list:
-            print("[STEP 6] Analyzing individual headline and applying JMoney logic...")
-            headline = item["headline"]
-            source = item["source"]
-            date = item["date"]
-            # Format date for Telegram and Google Sheet output
-            formatted_date = date
-            try:
-                if date:
-                    dt = datetime.datetime.fromisoformat(date.replace("Z", ""))
-                    formatted_date = dt.strftime("%Y-%m-%d %H:%M")
-            except Exception:
-                pass
-            # Compose JMoney context for GPT filtering
-            jmoney_context = None
-            if ticker in jmoney_details:
-                entry = jmoney_details[ticker]
-                jmoney_context = {
-                    "macro_score": entry.get("macro_score", ""),
-                    "sentiment": entry.get("sentiment", ""),
-                    "ZS10_score": entry.get("ZS10_score", ""),
-                    "strategy": entry.get("tp_strategy", ""),
-                    "signal_type": entry.get("signal_id", "")
-                }
-            gpt_result = classify_headline(headline, jmoney_context)
-            print("[STEP 7] GPT classification complete.")
-            summary = gpt_result.get("summary", "")
-            confidence = float(gpt_result.get("confidence", 0))
-            news_decision = gpt_result.get("category", "No News")
-            filter_decision = gpt_result.get("filter_decision", False)
-            # Catalyst type: only positive/negative/neutral if filter_decision is True, else Neutral
-            if filter_decision:
-                print("[STEP 8] Headline passed filter decision.")
-                catalyst_type = "Positive Catalyst" if news_decision == "Positive Catalyst" else ("Negative Catalyst" if news_decision == "Negative Catalyst" else "Neutral")
-            else:
-                catalyst_type = "Neutral"
-
-            # JMoney confirmation: confirmed if ticker is present in Confirmed tab
-            zs10_score = macro_score = strategy = signal_type = comment = sentiment_score = "Not Available"
-            jmoney_confirmed = ""
-            jmoney_note = ""
-            if ticker in jmoney_details:
-                print("[STEP 9] JMoney context found, marking as confirmed (no extra checks)...")
-                entry = jmoney_details[ticker]
-                zs10_score = entry.get("ZS10_score", "Not Available")
-                macro_score = entry.get("macro_score", "Not Available")
-                strategy = entry.get("tp_strategy", "Not Available")
-                signal_type = entry.get("signal_id", "Not Available")
-                comment = entry.get("comment", "Not Available")
-                sentiment_score = entry.get("sentiment", "Not Available")
-                jmoney_confirmed = "✅ JMoney Confirmed"
-                jmoney_note = "Confirmed: Ticker present in JMoney Confirmed tab."
-            else:
-                print(f"[STEP 9] Warning: {ticker} not found in JMoney Engine sheet.")
-
-            # --- Adaptive scoring logic using scoring.json ---
-            # Get weights from SCORING_PARAMS
-            recency_weight = SCORING_PARAMS.get("recency_weight", 0.4)
-            volume_weight = SCORING_PARAMS.get("volume_weight", 0.2)
-            reliability_weight = SCORING_PARAMS.get("reliability_weight", 0.2)
-            macro_weight = SCORING_PARAMS.get("macro_weight", 0.1)
-            jmoney_confirm_weight = SCORING_PARAMS.get("jmoney_confirm_weight", 0.1)
-
-            # Recency score (1 if within 24h, else 0)
-            recency_score = 1 if date and dt and (now - dt).total_seconds() < 86400 else 0
-            # Volume score (1 if volume_boost, else 0)
-            volume_score = 1 if volume_boost else 0
-            # Reliability score (1 for trusted sources, -0.5 for Finviz, else 0)
-            if source in ["MarketWatch", "Reuters"]:
-                reliability_score = 1
-            elif source == "Finviz":
-                reliability_score = -0.5
-            else:
-                reliability_score = 0
-            # Macro score (1 if macro_ratio > 0.6 and positive, else 0)
-            macro_score_val = 1 if macro_ratio > 0.6 and news_decision == "Positive Catalyst" else 0
-            # JMoney confirm score (1 if confirmed, else 0)
-            jmoney_score = 1 if jmoney_confirmed else 0
-
-            # Calculate confidence using weights
-            confidence = (
-                recency_score * recency_weight +
-                volume_score * volume_weight +
-                reliability_score * reliability_weight +
-                macro_score_val * macro_weight +
-                jmoney_score * jmoney_confirm_weight
-            ) * 10  # Scale to 0-10
-
-            confidence = min(10, max(0, round(confidence, 2)))
-
-            # Visual flag based on confidence
-            if confidence >= 8:
-                flag = "🟢"
-            elif confidence >= 5:
-                flag = "🟡"
-            else:
-                flag = "🔴"
-
-            # When building each item for results and telegram output, add watch logic:
-            watch = ""
-            # Watch: positive news, not in JMoney confirmed tab, and confidence moderately high (e.g., >=5)
-            if (
-                news_decision == "Positive Catalyst"
-                and not jmoney_confirmed
-                and float(confidence) >= 5
-            ):
-                watch = "-- Consider Watching 👁️"
-
-            results[ticker].append({
-                "ticker": ticker,
-                "headline": headline,
-                "source": source,
-                "date": date,
-                "summary": summary,
-                "news_decision": news_decision,
-                "catalyst_type": catalyst_type,
-                "confidence": confidence,
-                "flag": flag,
-                "jmoney_confirmed": jmoney_confirmed,
-                "zs10_score": zs10_score,
-                "macro_score": macro_score,
-                "strategy": strategy,
-                "signal_type": signal_type,
-                "jmoney_comment": comment,
-                "jmoney_note": jmoney_note,
-                "watch": watch  # New watch column
-            })
-            print(f"[STEP 11] Output: {flag} | {ticker} | {headline} | {summary} | {confidence} | {jmoney_confirmed} | ZS10: {zs10_score} | Macro: {macro_score} | Strategy: {strategy} | Signal: {signal_type}")
-            # Telegram output
-            telegram_msg = (
-                f"{flag} <b>{ticker}</b>{' ' + watch if watch else ''}\n"
-                f"<b>Headline:</b> {headline}\n"
-                f"<b>Summary:</b> {summary}\n"
-                f"<b>News Decision:</b> {news_decision}\n"
-                f"<b>Catalyst Type:</b> {catalyst_type}\n"
-                f"<b>Confidence:</b> {confidence}/10\n"
-                f"<b>Source:</b> {source}\n"
-                f"<b>Date:</b> {formatted_date}\n"
-                f"<b>JMoney:</b> {jmoney_confirmed}\n"
-                f"<b>JMoney Note:</b> {jmoney_note}\n"
-                f"<b>Macro:</b> {macro_score}\n"
-                f"<b>Strategy:</b> {strategy}\n"
-                f"<b>Signal:</b> {signal_type}\n"
-            )
-            send_telegram_message(telegram_msg)
 
-    print("[STEP 12] Output: Uploading results to Google Sheet...")
-    upload_to_sheet(results)
-    print("[STEP 13] Output: Results uploaded successfully.")
+def parse_args(argv=None):
+    from config import ARCHIVE_DIR
+    parser = argparse.ArgumentParser(description="Fetch, classify and publish ticker headlines.")
+    parser.add_argument("--once", action="store_true",
+                        help="run one cycle, wait for Telegram delivery and exit with a status code")
+    parser.add_argument("--all-sources", action="store_true",
+                        help="with --once, poll every source instead of only those that are due")
+    parser.add_argument("--record", action="store_true",
+                        help="store every cycle's pages, GPT replies and inputs in the archive")
+    parser.add_argument("--replay", nargs="?", const="latest", metavar="CYCLE",
+                        help="rerun a recorded cycle offline (default: the latest) and exit")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help=f"archive location (default: {ARCHIVE_DIR})")
+    return parser.parse_args(argv)
 
-def poll_for_commands():
-    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-    last_update_id = None
-    while True:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/getUpdates"
-        params = {"timeout": 30}
-        if last_update_id:
-            params["offset"] = last_update_id + 1
-        try:
-            resp = requests.get(url, params=params, timeout=35)
-            if not resp.ok:
-                time.sleep(10)
-                continue
-            updates = resp.json().get("result", [])
-            for update in updates:
-                last_update_id = update["update_id"]
-                message = update.get("message")
-                if not message:
-                    continue
-                text = message.get("text", "")
-                if text.strip() == "/clear":
-                    from telegram_bot import send_telegram_message, handle_clear_command
-                    send_telegram_message("Clearing all messages")
-                    handle_clear_command()
-                elif text.strip() == "/fetch":
-                    from telegram_bot import send_telegram_message
-                    send_telegram_message("Manual fetch triggered!")
-                    threading.Thread(target=fetch_and_process, kwargs={"loop_count":None}, daemon=True).start()
-        except Exception as e:
-            print(f"[TelegramBotRunner] Error: {e}")
-        time.sleep(5)
-
-def main():
+
+def main(argv=None):
+    global _archive
+    args = parse_args(argv)
+    setup_logging()
+    if args.replay:
+        from archive import Archive
+        replay_cycle(Archive(args.archive_dir), args.replay)
+        return EXIT_OK
+    check_credentials()
+    if args.record:
+        from archive import Archive, RecordingCache, RecordingClient
+        from classify import get_cache, get_client, set_cache, set_client
+        _archive = Archive(args.archive_dir)
+        set_client(RecordingClient(get_client(), _archive))
+        set_cache(RecordingCache(get_cache(), _archive))
+        logger.info("[Archive] Recording cycles to %s", args.archive_dir)
+    if args.once:
+        # No command poller or metrics server: nothing would be around to use them
+        return run_once(all_sources=args.all_sources)
+    from config import METRICS_HOST, METRICS_PORT
+    from metrics import start_metrics_server
+    start_metrics_server(METRICS_PORT, METRICS_HOST)
     threading.Thread(target=poll_for_commands, daemon=True).start()
+    run_loop()
+
+
+def run_loop(cycles=None):
+    """Run scheduled cycles forever (or `cycles` of them), sleeping until a source is due.
+
+    A failed cycle is logged and counted, and the loop carries on after
+    POLL_MIN_INTERVAL, so one bad cycle does not stop the process.
+    """
+    import metrics
+    from config import POLL_MIN_INTERVAL
     loop_count = 1
-    while True:
-        fetch_and_process(loop_count=loop_count)
-        interval = 3600  # 1 hour
-        for i in range(interval, 0, -1):
-            print(f"Fetching again in {i} seconds...", end="\r", flush=True)
-            time.sleep(1)
+    while cycles is None or loop_count <= cycles:
+        try:
+            get_coordinator().run("scheduled", loop_count=loop_count)
+            # Sleep until the next source is due (see scheduler.py for the per-source intervals)
+            next_due = get_scheduler().next_due()
+        except Exception:
+            metrics.ERRORS.inc(component="main")
+            logger.exception("[Main] Run #%s failed; trying again in %.0fs", loop_count, POLL_MIN_INTERVAL)
+            next_due = time.time() + POLL_MIN_INTERVAL
+        # Countdown goes to the terminal only, never to the log file
+        while True:
+            remaining = next_due - time.time()
+            if remaining <= 0:
+                break
+            sys.stdout.write(f"Fetching again in {math.ceil(remaining)} seconds...\r")
+            sys.stdout.flush()
+            time.sleep(min(1, remaining))
         loop_count += 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
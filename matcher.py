@@ -0,0 +1,82 @@
+from collections import deque
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+class AliasMatcher:
+    """Aho-Corasick automaton over every ticker alias in a ticker map.
+
+    Built once from {ticker: [aliases]}; match() scans a text in a single
+    pass and returns the tickers whose aliases occur in it, in ticker-map
+    order. Matching is case-insensitive and respects word boundaries, so
+    "Apple" does not match "Pineapple" and "GOLD" does not match "Goldman".
+    """
+
+    def __init__(self, ticker_map):
+        self.tickers = list(ticker_map.keys())
+        # Trie: one dict of transitions per state, plus failure links and outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, ticker in enumerate(self.tickers):
+            for alias in ticker_map.get(ticker, []):
+                pattern = alias.lower()
+                if pattern:
+                    self._add(pattern, index)
+        self._build_links()
+
+    def _add(self, pattern, ticker_index):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        # Boundary checks only apply where the alias itself starts/ends on a word character
+        self._out[state].append((
+            len(pattern),
+            ticker_index,
+            _is_word_char(pattern[0]),
+            _is_word_char(pattern[-1]),
+        ))
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                link = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = link if link != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def match(self, text):
+        """Return the tickers with at least one alias in text, in ticker-map order."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        found = set()
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, ticker_index, check_start, check_end in out[state]:
+                if ticker_index in found:
+                    continue
+                start = i - length + 1
+                if check_start and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if check_end and i < last and _is_word_char(text[i + 1]):
+                    continue
+                found.add(ticker_index)
+        return [self.tickers[index] for index in sorted(found)]
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import time
+
+
+class MessageStore:
+    """SQLite store of sent Telegram message IDs.
+
+    Safe for several writer threads and processes (WAL journal, a short
+    connection per call). IDs older than max_age seconds are evicted,
+    since Telegram only lets bots delete messages for 48 hours.
+    """
+
+    def __init__(self, path, max_age=48 * 3600):
+        self.path = path
+        self.max_age = max_age
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                "chat_id TEXT NOT NULL, message_id INTEGER NOT NULL, sent_at REAL NOT NULL, "
+                "PRIMARY KEY (chat_id, message_id))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def add(self, chat_id, message_id, sent_at=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO messages (chat_id, message_id, sent_at) VALUES (?, ?, ?)",
+                (str(chat_id), int(message_id), sent_at or time.time()),
+            )
+
+    def evict(self):
+        """Drop IDs too old to delete; returns how many were removed."""
+        with self._connect() as conn:
+            cur = conn.execute("DELETE FROM messages WHERE sent_at < ?", (time.time() - self.max_age,))
+            return cur.rowcount
+
+    def ids(self, chat_id):
+        """Deletable message IDs for a chat, oldest first."""
+        self.evict()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT message_id FROM messages WHERE chat_id = ? ORDER BY message_id", (str(chat_id),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def remove(self, chat_id, message_ids):
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM messages WHERE chat_id = ? AND message_id = ?",
+                [(str(chat_id), int(message_id)) for message_id in message_ids],
+            )
+
+    def import_legacy_file(self, chat_id, path):
+        """One-time import of a newline-separated ID file, dated by the file's mtime."""
+        if not os.path.exists(path):
+            return 0
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+                return 0
+            sent_at = os.path.getmtime(path)
+            with open(path, "r") as f:
+                rows = [(str(chat_id), int(line.strip()), sent_at) for line in f if line.strip().isdigit()]
+            conn.executemany("INSERT OR IGNORE INTO messages (chat_id, message_id, sent_at) VALUES (?, ?, ?)", rows)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (path,))
+        return len(rows)
@@ -0,0 +1,230 @@
+"""In-process metrics: latency histograms and counters, served as Prometheus text on /metrics.
+
+Metrics are plain module-level objects so any module can record into them
+without passing a registry around:
+
+    with metrics.SOURCE_FETCH_SECONDS.time(source=name):
+        ...
+    metrics.ERRORS.inc(component="sheets")
+
+cycle_summary() condenses what changed since the previous call into one
+log line, which main.py writes at the end of every cycle.
+"""
+import contextlib
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a cached lookup (sub-millisecond) up to a slow batched completion
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        """{label values: total}."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self):
+        """{label values: (count, sum)}."""
+        with self._lock:
+            return {key: (sum(state[:-1]), state[-1]) for key, state in self._values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), state[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", bound)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {state[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+SOURCE_FETCH_SECONDS = Histogram("source_fetch_seconds", "Time to fetch and parse one news source.", ["source"])
+GPT_CALL_SECONDS = Histogram(
+    "gpt_call_seconds", "Classification latency: cache lookups (hit) and chat completion requests (miss).", ["cache"]
+)
+SHEETS_CALL_SECONDS = Histogram("sheets_call_seconds", "Google Sheets / Drive API call latency.", ["call"])
+TELEGRAM_SEND_SECONDS = Histogram("telegram_send_seconds", "Telegram Bot API call latency.", ["method"])
+CYCLE_SECONDS = Histogram("cycle_seconds", "Duration of a whole fetch-and-process cycle.")
+HEADLINES_MATCHED = Counter("headlines_matched_total", "Headlines matched to a ticker.")
+HEADLINES_CLASSIFIED = Counter("headlines_classified_total", "Headlines classified, by cache result.", ["cache"])
+ALERTS_EMITTED = Counter("alerts_emitted_total", "Scored headlines handed to Telegram.")
+ERRORS = Counter("errors_total", "Errors by component.", ["component"])
+# Failed attempts that were retried; a retry that later succeeds is not an error
+RETRIES = Counter("retries_total", "Failed API attempts that were retried, by component.", ["component"])
+
+ALL_METRICS = [
+    SOURCE_FETCH_SECONDS, GPT_CALL_SECONDS, SHEETS_CALL_SECONDS, TELEGRAM_SEND_SECONDS, CYCLE_SECONDS,
+    HEADLINES_MATCHED, HEADLINES_CLASSIFIED, ALERTS_EMITTED, ERRORS, RETRIES,
+]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_last_summary = {}
+_summary_lock = threading.Lock()
+
+
+def _delta(metric):
+    """Changes of a metric since the previous cycle_summary(); {label values: value or (count, sum)}."""
+    current = metric.snapshot()
+    previous = _last_summary.get(metric.name, {})
+    _last_summary[metric.name] = current
+    if isinstance(metric, Counter):
+        return {key: value - previous.get(key, 0) for key, value in current.items() if value != previous.get(key, 0)}
+    changed = {}
+    for key, (count, total) in current.items():
+        old_count, old_total = previous.get(key, (0, 0.0))
+        if count != old_count:
+            changed[key] = (count - old_count, total - old_total)
+    return changed
+
+
+def cycle_summary():
+    """One line describing the work done since the previous call."""
+    with _summary_lock:
+        fetches = _delta(SOURCE_FETCH_SECONDS)
+        gpt = _delta(GPT_CALL_SECONDS)
+        sheets = _delta(SHEETS_CALL_SECONDS)
+        telegram = _delta(TELEGRAM_SEND_SECONDS)
+        matched = sum(_delta(HEADLINES_MATCHED).values())
+        classified = sum(_delta(HEADLINES_CLASSIFIED).values())
+        emitted = sum(_delta(ALERTS_EMITTED).values())
+        errors = _delta(ERRORS)
+        retries = sum(_delta(RETRIES).values())
+        _delta(CYCLE_SECONDS)
+
+    parts = []
+    if fetches:
+        (slowest,), (count, total) = max(fetches.items(), key=lambda item: item[1][1] / item[1][0])
+        parts.append(
+            f"fetch {sum(c for c, _ in fetches.values())} sources "
+            f"(slowest {slowest} {total / count:.2f}s)"
+        )
+    hits = gpt.get(("hit",), (0, 0.0))
+    misses = gpt.get(("miss",), (0, 0.0))
+    parts.append(f"gpt {misses[0]} requests in {misses[1]:.2f}s, {hits[0]} cache hits")
+    parts.append(f"sheets {sum(c for c, _ in sheets.values())} calls in {sum(t for _, t in sheets.values()):.2f}s")
+    parts.append(f"telegram {sum(c for c, _ in telegram.values())} calls")
+    parts.append(f"matched {matched:g}, classified {classified:g}, emitted {emitted:g}")
+    parts.append("errors " + (", ".join(f"{key[0]}={value:g}" for key, value in sorted(errors.items())) or "0"))
+    if retries:
+        parts.append(f"retries {retries:g}")
+    return "; ".join(parts)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("[Metrics] %s - %s", self.address_string(), format % args)
+
+
+_server = None
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve /metrics on host:port from a daemon thread. A port of 0 or less disables it."""
+    global _server
+    if port <= 0 or _server is not None:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error("[Metrics] Could not listen on %s:%d: %s", host, port, e)
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("[Metrics] Serving http://%s:%d/metrics", host, _server.server_address[1])
+    return _server
@@ -0,0 +1,252 @@
+"""Per-cycle news pipeline: parse dates -> classify -> macro context -> score -> emit.
+
+Each stage is a plain function over the previous stage's output so it can
+be run and tested on its own; run_pipeline() chains them and records how
+long each one took.
+"""
+import contextlib
+import datetime
+import logging
+import time
+
+import metrics
+from classify import FAILED_KEY, classify_many
+from records import ScoredHeadline
+from scoring import SCORING_PARAMS, score_headlines
+
+logger = logging.getLogger(__name__)
+
+RECENT_WINDOW_SECONDS = SCORING_PARAMS.get("recent_window_hours", 24) * 3600
+
+
+@contextlib.contextmanager
+def timed(stage, timings):
+    """Record the wall time of a stage in timings[stage] (seconds)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+        logger.info("[Pipeline] %s took %.3fs", stage, timings[stage])
+
+
+def jmoney_context_for(ticker, jmoney_details):
+    """Compose the JMoney context passed to GPT for a ticker, or None if unconfirmed."""
+    if ticker not in jmoney_details:
+        return None
+    entry = jmoney_details[ticker]
+    return {
+        "macro_score": entry.get("macro_score", ""),
+        "sentiment": entry.get("sentiment", ""),
+        "ZS10_score": entry.get("ZS10_score", ""),
+        "strategy": entry.get("tp_strategy", ""),
+        "signal_type": entry.get("signal_id", "")
+    }
+
+
+def parse_dates_stage(headlines, now):
+    """Stage 1: flag headlines inside the recency window.
+
+    Dates were parsed when the Headline records were built (see records.py).
+    Returns {ticker: [(item, dt, is_recent)]} where dt is None when the
+    date is missing or unparsable.
+    """
+    parsed = {}
+    for ticker, hl_list in headlines.items():
+        rows = []
+        for item in hl_list:
+            dt = item.published
+            is_recent = bool(dt and (now - dt).total_seconds() < RECENT_WINDOW_SECONDS)
+            rows.append((item, dt, is_recent))
+        parsed[ticker] = rows
+    return parsed
+
+
+def classify_stage(parsed, jmoney_details):
+    """Stage 2: classify every headline exactly once, with its ticker's JMoney context.
+
+    Returns {ticker: [gpt_result]} aligned with parsed[ticker].
+    """
+    items = {}
+    for ticker, rows in parsed.items():
+        jmoney_context = jmoney_context_for(ticker, jmoney_details)
+        for i, (item, _, _) in enumerate(rows):
+            items[(ticker, i)] = (item.headline, jmoney_context)
+    logger.info("[STEP 5] Classifying %d headlines...", len(items))
+    classified = classify_many(items)
+    return {ticker: [classified[(ticker, i)] for i in range(len(rows))] for ticker, rows in parsed.items()}
+
+
+def macro_stage(parsed, classified, history=None, now=None):
+    """Stage 3: per-ticker share of recent headlines classified as Positive Catalyst.
+
+    history holds results carried over from earlier cycles ({ticker: [ScoredHeadline]});
+    the recent ones count towards volume and macro context as well. A
+    clustered headline counts once per member (see clustering.py).
+    Returns {ticker: (recent_count, macro_ratio)}.
+    """
+    history = history or {}
+    now = now or datetime.datetime.utcnow()
+    macro = {}
+    for ticker, rows in parsed.items():
+        macro_sentiments = [
+            (gpt_result.get("category", "No News"), item.cluster_size)
+            for (item, _, is_recent), gpt_result in zip(rows, classified[ticker])
+            if is_recent
+        ]
+        for result in history.get(ticker, []):
+            dt = result.published
+            if dt and (now - dt).total_seconds() < RECENT_WINDOW_SECONDS:
+                macro_sentiments.append((result.news_decision or "No News", result.cluster_size))
+        macro_total = sum(size for _, size in macro_sentiments)
+        macro_positive = sum(size for s, size in macro_sentiments if s == "Positive Catalyst")
+        macro[ticker] = (macro_total, macro_positive / macro_total if macro_total else 0)
+    return macro
+
+
+def score_stage(parsed, classified, macro, jmoney_details, params=None):
+    """Stage 4: apply JMoney logic and adaptive scoring.
+
+    The whole cycle is scored in one vectorized call (see scoring.py).
+    Returns {ticker: [ScoredHeadline]}.
+    """
+    recent, recent_count, sources, positive, macro_ratio, confirmed = [], [], [], [], [], []
+    for ticker, rows in parsed.items():
+        count, ratio = macro[ticker]
+        is_confirmed = ticker in jmoney_details
+        for (item, _, is_recent), gpt_result in zip(rows, classified[ticker]):
+            recent.append(is_recent)
+            recent_count.append(count)
+            # Every source of a cluster, so reliability can take the best one
+            sources.append(item.sources or item.source)
+            positive.append(gpt_result.get("category", "No News") == "Positive Catalyst")
+            macro_ratio.append(ratio)
+            confirmed.append(is_confirmed)
+    scores = score_headlines(recent, recent_count, sources, positive, macro_ratio, confirmed, params)
+    confidences = scores["confidence"].tolist()
+    flags = scores["flag"].tolist()
+    watches = scores["watch"].tolist()
+
+    results = {}
+    position = 0
+    for ticker, rows in parsed.items():
+        logger.debug("[STEP 4] Processing ticker: %s", ticker)
+        # JMoney confirmation: confirmed if ticker is present in Confirmed tab
+        zs10_score = macro_score = strategy = signal_type = comment = "Not Available"
+        jmoney_confirmed = ""
+        jmoney_note = ""
+        if ticker in jmoney_details:
+            logger.debug("[STEP 9] JMoney context found for %s, marking as confirmed (no extra checks)...", ticker)
+            entry = jmoney_details[ticker]
+            zs10_score = entry.get("ZS10_score", "Not Available")
+            macro_score = entry.get("macro_score", "Not Available")
+            strategy = entry.get("tp_strategy", "Not Available")
+            signal_type = entry.get("signal_id", "Not Available")
+            comment = entry.get("comment", "Not Available")
+            jmoney_confirmed = "✅ JMoney Confirmed"
+            jmoney_note = "Confirmed: Ticker present in JMoney Confirmed tab."
+        elif rows:
+            logger.debug("[STEP 9] %s not found in JMoney Engine sheet.", ticker)
+
+        results[ticker] = []
+        for (item, dt, _), gpt_result in zip(rows, classified[ticker]):
+            news_decision = gpt_result.get("category", "No News")
+            # Catalyst type: only positive/negative/neutral if filter_decision is True, else Neutral
+            if gpt_result.get("filter_decision", False) and news_decision in ("Positive Catalyst", "Negative Catalyst"):
+                catalyst_type = news_decision
+            else:
+                catalyst_type = "Neutral"
+            results[ticker].append(ScoredHeadline(
+                ticker=ticker,
+                headline=item.headline,
+                source=item.source,
+                date=item.date,
+                published=dt,
+                sources=item.sources,
+                cluster_size=item.cluster_size,
+                summary=gpt_result.get("summary", ""),
+                news_decision=news_decision,
+                catalyst_type=catalyst_type,
+                confidence=confidences[position],
+                flag=flags[position],
+                jmoney_confirmed=jmoney_confirmed,
+                zs10_score=zs10_score,
+                macro_score=macro_score,
+                strategy=strategy,
+                signal_type=signal_type,
+                jmoney_comment=comment,
+                jmoney_note=jmoney_note,
+                watch="-- Consider Watching 👁️" if watches[position] else "",
+                classified=not gpt_result.get(FAILED_KEY, False),
+            ))
+            position += 1
+    return results
+
+
+def format_telegram_message(result):
+    """Render one ScoredHeadline as the HTML Telegram card."""
+    watch = result.watch
+    dt = result.published
+    formatted_date = dt.strftime("%Y-%m-%d %H:%M") if dt else result.date
+    return (
+        f"{result.flag} <b>{result.ticker}</b>{' ' + watch if watch else ''}\n"
+        f"<b>Headline:</b> {result.headline}\n"
+        f"<b>Summary:</b> {result.summary}\n"
+        f"<b>News Decision:</b> {result.news_decision}\n"
+        f"<b>Catalyst Type:</b> {result.catalyst_type}\n"
+        f"<b>Confidence:</b> {result.confidence}/10\n"
+        f"<b>Source:</b> {', '.join(result.all_sources())}\n"
+        f"<b>Date:</b> {formatted_date}\n"
+        f"<b>JMoney:</b> {result.jmoney_confirmed}\n"
+        f"<b>JMoney Note:</b> {result.jmoney_note}\n"
+        f"<b>Macro:</b> {result.macro_score}\n"
+        f"<b>Strategy:</b> {result.strategy}\n"
+        f"<b>Signal:</b> {result.signal_type}\n"
+    )
+
+
+def emit_stage(results, send):
+    """Stage 5: log each result and hand its Telegram card to send().
+
+    Results GPT could not classify get no card; they are retried next cycle
+    (see SeenStore.record) and alerted once they are classified.
+    """
+    debug = logger.isEnabledFor(logging.DEBUG)
+    skipped = 0
+    for ticker, items in results.items():
+        for r in items:
+            if not r.classified:
+                skipped += 1
+                continue
+            if debug:
+                logger.debug(
+                    "[STEP 11] Output: %s | %s | %s | %s | %s | %s | ZS10: %s | Macro: %s | Strategy: %s | Signal: %s",
+                    r.flag, ticker, r.headline, r.summary, r.confidence, r.jmoney_confirmed,
+                    r.zs10_score, r.macro_score, r.strategy, r.signal_type,
+                )
+            send(format_telegram_message(r))
+            metrics.ALERTS_EMITTED.inc()
+    if skipped:
+        logger.warning("[Pipeline] %d headlines could not be classified; no alert sent, retrying next cycle.", skipped)
+
+
+def run_pipeline(headlines, jmoney_details, send, now=None, history=None):
+    """Run every stage over one cycle's headlines.
+
+    history is {ticker: [ScoredHeadline]} from earlier cycles; it only feeds the
+    macro/volume context and is not re-scored or re-sent.
+    Returns (results, timings) where timings maps stage name to seconds.
+    """
+    now = now or datetime.datetime.utcnow()
+    timings = {}
+    with timed("parse_dates", timings):
+        parsed = parse_dates_stage(headlines, now)
+    with timed("classify", timings):
+        classified = classify_stage(parsed, jmoney_details)
+    with timed("macro", timings):
+        macro = macro_stage(parsed, classified, history, now)
+    with timed("score", timings):
+        results = score_stage(parsed, classified, macro, jmoney_details)
+    with timed("emit", timings):
+        emit_stage(results, send)
+    return results, timings
@@ -0,0 +1,53 @@
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per `per` seconds.
+
+    acquire() blocks until enough tokens are available. pause() stops all
+    acquisitions for a while, e.g. when a server answers with Retry-After.
+    A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.rate = rate / per if rate > 0 else 0
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        if not self.rate:
+            self._wait_pause()
+            return
+        # A request larger than the bucket would never fit; let it through when full
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _wait_pause(self):
+        wait = self.blocked_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Exponential backoff with full jitter for a zero-based attempt number."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,100 @@
+"""Typed records for headlines as they move through a cycle.
+
+Headline is a scraped candidate matched to a ticker; ScoredHeadline is the
+classified and scored result that goes to the Sheet, Telegram and the seen
+store. Both are slotted dataclasses, and the publish date is parsed once
+when the record is built; `date` keeps the scraped ISO string for output.
+"""
+import datetime
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
+
+
+def parse_date(date_str):
+    """Parse a scraped ISO date ('...Z' allowed) into a naive UTC datetime, or None."""
+    try:
+        if date_str:
+            return datetime.datetime.fromisoformat(date_str.replace("Z", ""))
+    except Exception:
+        pass
+    return None
+
+
+@dataclass(slots=True)
+class Headline:
+    headline: str
+    source: str
+    date: str
+    published: Optional[datetime.datetime] = None
+    # Every source of a near-duplicate cluster (see clustering.py); empty for a lone headline
+    sources: Tuple[str, ...] = ()
+    cluster_size: int = 1
+
+    @classmethod
+    def scraped(cls, headline, source, date):
+        return cls(headline, source, date, parse_date(date))
+
+    def all_sources(self):
+        return self.sources or (self.source,)
+
+
+@dataclass(slots=True)
+class ScoredHeadline:
+    ticker: str
+    headline: str
+    source: str
+    date: str
+    published: Optional[datetime.datetime]
+    sources: Tuple[str, ...]
+    cluster_size: int
+    summary: str
+    news_decision: str
+    catalyst_type: str
+    confidence: float
+    flag: str
+    jmoney_confirmed: str
+    zs10_score: str
+    macro_score: str
+    strategy: str
+    signal_type: str
+    jmoney_comment: str
+    jmoney_note: str
+    watch: str
+    # False when GPT could not be reached and the default "No News" result was used
+    classified: bool = True
+
+    def all_sources(self):
+        return self.sources or (self.source,)
+
+    def to_headline(self):
+        """The raw headline again, e.g. to re-classify it after JMoney confirms its ticker."""
+        return Headline(self.headline, self.source, self.date, self.published, self.sources, self.cluster_size)
+
+    def to_dict(self):
+        """JSON-ready dict; the parsed date is left out since `date` holds it."""
+        data = {name: getattr(self, name) for name in _SCORED_FIELDS}
+        data["sources"] = list(self.sources)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Inverse of to_dict(); fields missing from older stored results get defaults."""
+        values = {name: data.get(name, "") for name in _SCORED_FIELDS}
+        values["sources"] = tuple(data.get("sources") or ())
+        values["cluster_size"] = data.get("cluster_size", 1)
+        values["confidence"] = data.get("confidence", 0)
+        values["classified"] = data.get("classified", True)
+        return cls(published=parse_date(values["date"]), **values)
+
+
+_SCORED_FIELDS = tuple(f.name for f in fields(ScoredHeadline) if f.name != "published")
+
+
+def to_dicts(results):
+    """{ticker: [ScoredHeadline]} as {ticker: [dict]} for JSON."""
+    return {ticker: [r.to_dict() for r in items] for ticker, items in results.items()}
+
+
+def from_dicts(data):
+    """Inverse of to_dicts()."""
+    return {ticker: [ScoredHeadline.from_dict(r) for r in items] for ticker, items in data.items()}
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Prior rate (new headlines per hour) for a source that has not been observed yet
+DEFAULT_RATE = 1.0
+# Keeps a source that published nothing lately in the schedule, at the slowest interval
+RATE_FLOOR = 0.05
+
+
+def plan_intervals(rates, budget, min_interval, max_interval):
+    """Split a budget of polls per hour across sources in proportion to their rates.
+
+    Returns {name: interval_seconds}, each within [min_interval, max_interval].
+    Sources pinned at a bound are taken out and the rest of the budget is
+    shared again among the others, so the total stays close to budget.
+    """
+    intervals = {}
+    free = {name: max(rate, RATE_FLOOR) for name, rate in rates.items()}
+    remaining = float(budget)
+    while free:
+        if remaining <= 0:
+            intervals.update({name: max_interval for name in free})
+            break
+        total = sum(free.values())
+        pinned = {}
+        for name, weight in free.items():
+            interval = 3600 * total / (remaining * weight)
+            if interval < min_interval:
+                pinned[name] = min_interval
+            elif interval > max_interval:
+                pinned[name] = max_interval
+        if not pinned:
+            intervals.update({name: 3600 * total / (remaining * weight) for name, weight in free.items()})
+            break
+        for name, interval in pinned.items():
+            intervals[name] = interval
+            remaining -= 3600 / interval
+            del free[name]
+    return intervals
+
+
+class PollScheduler:
+    """Per-source polling schedule driven by each source's observed publish rate.
+
+    The rate of new headlines per hour is an exponentially weighted moving
+    average over polls. Every source gets a share of `budget` polls per hour
+    proportional to its rate, clamped to [min_interval, max_interval], so
+    busy feeds are polled more often and quiet ones less, without raising
+    the total number of requests. State is kept in a JSON file so rates
+    survive restarts.
+    """
+
+    def __init__(self, names, path, budget=None, min_interval=300, max_interval=7200, alpha=0.3):
+        self.names = list(names)
+        self.path = path
+        self.budget = budget or len(self.names)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.sources = {}
+        self.confirmed = None
+        self._load()
+        for name in self.names:
+            self.sources.setdefault(name, {"rate": None, "last_polled": None, "next_due": 0.0})
+        self._replan()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning("[Scheduler] Ignoring unreadable schedule: %s", e)
+            return
+        self.sources = {name: entry for name, entry in data.get("sources", {}).items() if name in self.names}
+        if data.get("confirmed") is not None:
+            self.confirmed = set(data["confirmed"])
+
+    def save(self):
+        with self._lock:
+            data = {
+                "sources": self.sources,
+                "confirmed": sorted(self.confirmed) if self.confirmed is not None else None,
+            }
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error("[Scheduler] Failed to write schedule: %s", e)
+
+    def _replan(self):
+        known = [entry["rate"] for entry in self.sources.values() if entry["rate"] is not None]
+        prior = sum(known) / len(known) if known else DEFAULT_RATE
+        rates = {
+            name: entry["rate"] if entry["rate"] is not None else prior
+            for name, entry in self.sources.items()
+        }
+        intervals = plan_intervals(rates, self.budget, self.min_interval, self.max_interval)
+        for name, entry in self.sources.items():
+            entry["interval"] = intervals[name]
+            if entry["last_polled"] is not None:
+                entry["next_due"] = min(entry["next_due"], entry["last_polled"] + intervals[name])
+
+    def due(self, now=None):
+        """Names of sources due for a poll, in configuration order."""
+        now = now or time.time()
+        with self._lock:
+            return [name for name in self.names if self.sources[name]["next_due"] <= now]
+
+    def next_due(self):
+        """Epoch time at which the next source becomes due."""
+        with self._lock:
+            return min(entry["next_due"] for entry in self.sources.values())
+
+    def record(self, counts, now=None):
+        """Update rates from {name: new headline count} and reschedule those sources.
+
+        A count of None (failed fetch, or no earlier page to compare with)
+        reschedules the source without touching its rate.
+        """
+        now = now or time.time()
+        with self._lock:
+            for name, count in counts.items():
+                entry = self.sources.get(name)
+                if entry is None:
+                    continue
+                if count is not None and entry["last_polled"] is not None:
+                    hours = max(now - entry["last_polled"], 1.0) / 3600
+                    observed = count / hours
+                    if entry["rate"] is None:
+                        entry["rate"] = observed
+                    else:
+                        entry["rate"] += self.alpha * (observed - entry["rate"])
+                entry["last_polled"] = now
+                entry["next_due"] = float("inf")
+            self._replan()
+        self.save()
+
+    def update_confirmed(self, tickers):
+        """Store the current JMoney-confirmed tickers; return the ones newly confirmed.
+
+        Nothing counts as new on the very first call, when there is no
+        earlier set to compare with.
+        """
+        tickers = set(tickers)
+        with self._lock:
+            previous = self.confirmed
+            self.confirmed = tickers
+        if previous is None:
+            self.save()
+            return set()
+        added = tickers - previous
+        if tickers != previous:
+            self.save()
+        return added
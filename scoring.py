@@ -0,0 +1,96 @@
+"""Vectorized adaptive scoring for a whole cycle of headlines.
+
+Inputs are equal-length columns (one entry per headline); every component,
+the final 0-10 confidence and the visual flag are computed in one NumPy pass.
+Weights, source reliability and thresholds come from config/scoring.json.
+"""
+import json
+import os
+
+import numpy as np
+
+FLAG_GREEN = "🟢"
+FLAG_YELLOW = "🟡"
+FLAG_RED = "🔴"
+
+
+def load_scoring_params():
+    """Load scoring weights and thresholds from config/scoring.json."""
+    scoring_path = os.path.join(os.path.dirname(__file__), "config", "scoring.json")
+    with open(scoring_path, "r") as f:
+        return json.load(f)
+
+
+SCORING_PARAMS = load_scoring_params()
+
+
+def reliability_scores(sources, params=None):
+    """Map source names to reliability scores via params["source_reliability"].
+
+    An entry may also be a list of sources (a near-duplicate cluster); it
+    scores as its most reliable source.
+    """
+    params = SCORING_PARAMS if params is None else params
+    table = params.get("source_reliability", {})
+    default = float(params.get("default_reliability", 0))
+    get = table.get
+    return np.fromiter(
+        (get(source, default) if isinstance(source, str) else max(get(s, default) for s in source)
+         for source in sources),
+        dtype=np.float64, count=len(sources),
+    )
+
+
+def score_headlines(recent, recent_count, sources, positive, macro_ratio, confirmed,
+                    params=None, breakdown=False):
+    """Score a cycle of headlines.
+
+    recent: bool, headline is inside the recency window
+    recent_count: int, number of recent headlines for the headline's ticker
+    sources: source name, or list of source names, per headline
+    positive: bool, GPT category is "Positive Catalyst"
+    macro_ratio: float, share of the ticker's recent headlines that are positive
+    confirmed: bool, ticker is in the JMoney Confirmed tab
+
+    Returns {"confidence", "flag", "watch"} arrays, plus the per-component
+    scores ("recency", "volume", "reliability", "macro", "jmoney") when
+    breakdown is True.
+    """
+    params = SCORING_PARAMS if params is None else params
+    recent = np.asarray(recent, dtype=bool)
+    positive = np.asarray(positive, dtype=bool)
+    confirmed = np.asarray(confirmed, dtype=bool)
+
+    recency = recent.astype(np.float64)
+    volume = (np.asarray(recent_count) >= params.get("volume_min_recent", 4)).astype(np.float64)
+    reliability = reliability_scores(sources, params)
+    macro = ((np.asarray(macro_ratio, dtype=np.float64) > params.get("macro_ratio_threshold", 0.6)) & positive).astype(np.float64)
+    jmoney = confirmed.astype(np.float64)
+
+    confidence = (
+        recency * params.get("recency_weight", 0.4) +
+        volume * params.get("volume_weight", 0.2) +
+        reliability * params.get("reliability_weight", 0.2) +
+        macro * params.get("macro_weight", 0.1) +
+        jmoney * params.get("jmoney_confirm_weight", 0.1)
+    ) * 10  # Scale to 0-10
+    confidence = np.clip(np.round(confidence, 2), 0, 10)
+
+    thresholds = params.get("flag_thresholds", {})
+    flag = np.where(
+        confidence >= thresholds.get("green", 8), FLAG_GREEN,
+        np.where(confidence >= thresholds.get("yellow", 5), FLAG_YELLOW, FLAG_RED),
+    )
+    # Watch: positive news, not JMoney confirmed, confidence moderately high
+    watch = positive & ~confirmed & (confidence >= params.get("watch_threshold", 5))
+
+    scores = {"confidence": confidence, "flag": flag, "watch": watch}
+    if breakdown:
+        scores.update({
+            "recency": recency,
+            "volume": volume,
+            "reliability": reliability,
+            "macro": macro,
+            "jmoney": jmoney,
+        })
+    return scores
@@ -1,42 +1,224 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import hashlib
 import os
 import json
+import logging
+import re
+import threading
+from urllib.parse import urlsplit
 
-def fetch_headlines(ticker_map):
+import metrics
+from extractors import extract_headlines
+from matcher import AliasMatcher
+from records import Headline
+from config import FETCH_MAX_WORKERS, FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT, SOURCES_FILE, STATE_DIR
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+HTTP_CACHE_DIR = os.path.join(STATE_DIR, "http_cache")
+# Bump when extraction changes so cached candidates from older parsers are not reused
+PAGE_CACHE_VERSION = 2
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def source_host_count():
+    """Number of distinct (scheme, host) pairs in the source list, or 0 if it cannot be read."""
+    try:
+        return len({urlsplit(source["url"])[:2] for source in load_sources().values()})
+    except Exception as e:
+        logger.warning("[Fetch] Could not count source hosts: %s", e)
+        return 0
+
+
+def get_session():
+    """Return the process-wide keep-alive session used for all source fetches.
+
+    The adapter keeps one connection pool per source host, so no host's
+    keep-alive connections are evicted to make room for another's, and up
+    to FETCH_MAX_WORKERS connections per host.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=max(FETCH_MAX_WORKERS, source_host_count()), pool_maxsize=FETCH_MAX_WORKERS,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(HEADERS)
+            _session = session
+    return _session
+
+
+def load_sources():
+    """Load config/sources.json (or SOURCES_FILE) as {name: {"url", "timeout"}}.
+
+    An entry is either a plain URL or an object with "url" and optional
+    "connect_timeout"/"read_timeout" overrides for slow sites.
+    """
+    with open(SOURCES_FILE, "r") as f:
+        raw = json.load(f)
+    sources = {}
+    for name, entry in raw.items():
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        sources[name] = {
+            "url": entry["url"],
+            "timeout": (
+                float(entry.get("connect_timeout", FETCH_CONNECT_TIMEOUT)),
+                float(entry.get("read_timeout", FETCH_READ_TIMEOUT)),
+            ),
+        }
+    return sources
+
+
+def _cache_path(name):
+    safe_name = re.sub(r"[^A-Za-z0-9_-]+", "_", name)
+    return os.path.join(HTTP_CACHE_DIR, f"{safe_name}.json")
+
+
+def load_page_cache(name):
+    """Return the cached validators and candidates for a source, or {}."""
+    try:
+        with open(_cache_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning("[%s] Ignoring unreadable page cache: %s", name, e)
+        return {}
+
+
+def save_page_cache(name, entry):
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        path = _cache_path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error("[%s] Failed to write page cache: %s", name, e)
+
+
+def parse_candidates(name, html):
+    """Extract [headline, date] candidates from a page.
+
+    The date is the publish time found by the source's extractor, or the
+    parse time when the page does not expose one.
+    """
+    fetched_at = datetime.datetime.utcnow().isoformat() + 'Z'
+    return [[text, published or fetched_at] for text, published in extract_headlines(name, html)]
+
+
+def fetch_source(session, name, source, new_counts=None, use_cache=True):
+    """Download one source page and return its [headline, date] candidates.
+
+    Sends If-None-Match/If-Modified-Since from the on-disk cache and reuses
+    the cached candidates on a 304 or when the body hash is unchanged, so
+    unchanged pages are never re-parsed. Returns None if the fetch failed.
+    If new_counts is given, new_counts[name] is set to the number of
+    headlines not on the previously cached page (None when there was none).
+    use_cache=False neither reads nor writes the page cache.
+    """
+    cached = load_page_cache(name) if use_cache else {}
+    if cached.get("url") != source["url"] or cached.get("version") != PAGE_CACHE_VERSION:
+        cached = {}
+    if new_counts is not None:
+        new_counts[name] = None
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        response = session.get(source["url"], headers=headers, timeout=source["timeout"])
+        if response.status_code == 304 and "candidates" in cached:
+            if new_counts is not None:
+                new_counts[name] = 0
+            return cached["candidates"]
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        if body_hash == cached.get("body_hash") and "candidates" in cached:
+            candidates = cached["candidates"]
+        else:
+            candidates = parse_candidates(name, response.text)
+        if new_counts is not None and "candidates" in cached:
+            previous = {text for text, _ in cached["candidates"]}
+            new_counts[name] = sum(1 for text, _ in candidates if text not in previous)
+        if response.ok and use_cache:
+            save_page_cache(name, {
+                "version": PAGE_CACHE_VERSION,
+                "url": source["url"],
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "body_hash": body_hash,
+                "candidates": candidates,
+            })
+        return candidates
+    except Exception as e:
+        metrics.ERRORS.inc(component="fetch")
+        logger.error("[%s] Failed to fetch: %s", name, e)
+        return None
+
+
+def timed_fetch_source(session, name, source, new_counts=None, use_cache=True):
+    """fetch_source() recorded in the per-source latency histogram."""
+    with metrics.SOURCE_FETCH_SECONDS.time(source=name):
+        return fetch_source(session, name, source, new_counts, use_cache)
+
+
+def fetch_headlines(ticker_map, max_workers=None, matcher=None, sources=None, new_counts=None,
+                    session=None, use_page_cache=True):
+    """Fetch sources concurrently and return {ticker: [Headline]}.
+
+    A headline that names several tickers is one Headline shared by their lists.
+
+    sources limits the fetch to those source names (all by default).
+    new_counts, if given, receives each fetched source's new headline
+    count as reported by fetch_source(). session replaces the shared
+    keep-alive session (archive.py passes a recording or replaying one).
+    """
     ticker_order = list(ticker_map.keys())
     headlines_by_ticker = {ticker: [] for ticker in ticker_order}
+    if matcher is None:
+        matcher = AliasMatcher(ticker_map)
 
-    # Load sources from config/sources.json
-    sources_path = os.path.join(os.path.dirname(__file__), "config", "sources.json")
-    with open(sources_path, "r") as f:
-        sources = json.load(f)
+    all_sources = load_sources()
+    if sources is None:
+        sources = all_sources
+    else:
+        wanted = set(sources)
+        sources = {name: source for name, source in all_sources.items() if name in wanted}
+    if not sources:
+        return headlines_by_ticker
+    workers = max(1, min(max_workers or FETCH_MAX_WORKERS, len(sources)))
+    session = session or get_session()
 
-    import datetime
     seen_headlines = set()
-    for name, url in sources.items():
-        try:
-            response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(response.text, "html.parser")
-            articles = soup.find_all(["h3", "a", "p"])
-
-            for tag in articles:
-                text = tag.get_text(strip=True)
-                date = datetime.datetime.utcnow().isoformat() + 'Z'
+    matched = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(timed_fetch_source, session, name, source, new_counts, use_page_cache) for name, source in sources.items()}
+        # Merge in sources.json order so output does not depend on which site answers first
+        for name in sources:
+            candidates = futures[name].result()
+            if candidates is None:
+                continue
+            for text, date in candidates:
                 if text in seen_headlines:
                     continue
                 seen_headlines.add(text)
-                for ticker in ticker_order:
-                    aliases = ticker_map.get(ticker, [])
-                    for alias in aliases:
-                        if alias.lower() in text.lower():
-                            headlines_by_ticker[ticker].append({
-                                "headline": text,
-                                "source": name,
-                                "date": date
-                            })
-                            break
-        except Exception as e:
-            print(f"[{name}] Failed to fetch: {e}")
+                item = None
+                for ticker in matcher.match(text):
+                    matched += 1
+                    if item is None:
+                        item = Headline.scraped(text, name, date)
+                    headlines_by_ticker[ticker].append(item)
+    metrics.HEADLINES_MATCHED.inc(matched)
     return headlines_by_ticker
-
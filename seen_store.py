@@ -0,0 +1,119 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from records import ScoredHeadline
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_headline(text):
+    """Lowercase, drop punctuation and collapse whitespace so trivial edits share a key."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+class SeenStore:
+    """Persistent record of processed (ticker, normalized headline, source) keys.
+
+    Each key keeps its first-seen time and the result produced for it, so
+    later cycles can skip classification and alerting for it while still
+    carrying the result forward. Keys older than ttl seconds are pruned.
+    """
+
+    def __init__(self, path, ttl=48 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "ticker TEXT NOT NULL, headline_key TEXT NOT NULL, source TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, result TEXT, "
+            "PRIMARY KEY (ticker, headline_key, source))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_first_seen ON seen (first_seen)")
+        self._conn.commit()
+
+    def prune(self):
+        """Delete keys older than the TTL; returns the number removed."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM seen WHERE first_seen < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            return cur.rowcount
+
+    def split_new(self, headlines):
+        """Split {ticker: [Headline]} into (new headlines, carried results).
+
+        New headlines keep the input shape and order. Carried results are
+        {ticker: [ScoredHeadline]} for every unexpired key already processed,
+        in first-seen order, whether or not it was scraped again this cycle.
+        """
+        self.prune()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ticker, headline_key, source, result FROM seen ORDER BY first_seen, rowid"
+            ).fetchall()
+        known = set()
+        carried = {}
+        for ticker, headline_key, source, result in rows:
+            known.add((ticker, headline_key, source))
+            if result:
+                carried.setdefault(ticker, []).append(ScoredHeadline.from_dict(json.loads(result)))
+        new = {}
+        for ticker, hl_list in headlines.items():
+            new[ticker] = [
+                item for item in hl_list
+                if (ticker, normalize_headline(item.headline), item.source) not in known
+            ]
+        return new, carried
+
+    def mark_seen(self, headlines):
+        """Store {ticker: [Headline]} keys without a result, e.g. near-duplicates folded into another headline.
+
+        They are skipped by later cycles but not carried forward.
+        """
+        now = time.time()
+        rows = [
+            (ticker, normalize_headline(item.headline), item.source, now)
+            for ticker, items in headlines.items()
+            for item in items
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO seen (ticker, headline_key, source, first_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (ticker, headline_key, source) DO NOTHING",
+                rows,
+            )
+            self._conn.commit()
+
+    def record(self, results):
+        """Store {ticker: [ScoredHeadline]} produced this cycle under their keys.
+
+        A key that is already known keeps its first-seen time and gets the
+        new result, e.g. when a ticker is re-scored after JMoney confirms it.
+        Results whose classification failed are left out, so the next cycle
+        sees their headlines as new and classifies them again.
+        """
+        now = time.time()
+        rows = [
+            (ticker, normalize_headline(r.headline), r.source, now, json.dumps(r.to_dict(), ensure_ascii=False))
+            for ticker, items in results.items()
+            for r in items
+            if r.classified
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO seen (ticker, headline_key, source, first_seen, result) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (ticker, headline_key, source) DO UPDATE SET result = excluded.result",
+                rows,
+            )
+            self._conn.commit()
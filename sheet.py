@@ -1,53 +1,132 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from config import GOOGLE_SERVICE_ACCOUNT_JSON, SHEET_NAME
+from config import SHEET_NAME
+import sheets_client
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Added "Strategy", "Signal ID", and "Watch" columns
+HEADER = [
+    "Ticker", "Headline", "Source", "Date", "Summary", "News Decision", "Catalyst Type",
+    "Confidence Score", "Visual Flag", "JMoney Confirmed", "Macro Score",
+    "Strategy", "Signal ID", "JMoney Note"
+]
+
+
+def format_row(item):
+    """Sheet row for a ScoredHeadline."""
+    date = item.published.strftime("%Y-%m-%d %H:%M") if item.published else item.date
+    # Add strategy, signal_id, and watch
+    return [
+        item.ticker,
+        item.headline,
+        item.source,
+        date,
+        item.summary,
+        item.news_decision,
+        item.catalyst_type,
+        item.confidence,
+        item.flag,
+        item.jmoney_confirmed,
+        item.macro_score,
+        item.strategy,
+        item.signal_type,
+        item.jmoney_note
+    ]
+
+
+def _cell(value):
+    """Render a value the way the Sheets API reads it back, for comparisons."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return "" if value is None else str(value)
+
+
+def _normalize(row):
+    cells = [_cell(v) for v in row[:len(HEADER)]]
+    return cells + [""] * (len(HEADER) - len(cells))
+
+
+def _column_letter(index):
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def diff_rows(existing_rows, desired_rows):
+    """Diff sheet data rows (header excluded) against the desired rows.
+
+    Rows are keyed on (ticker, headline). Returns (layout, inserts, updates,
+    deletes): layout is the new row list, where surviving rows keep their
+    relative order and inserts are appended at the end.
+    """
+    desired = {}
+    for row in desired_rows:
+        desired.setdefault((_cell(row[0]), _cell(row[1])), row)
+    layout = []
+    kept = set()
+    updates = deletes = 0
+    for row in existing_rows:
+        key = tuple(_normalize(row)[:2])
+        if key not in desired or key in kept:
+            deletes += 1
+            continue
+        kept.add(key)
+        if _normalize(desired[key]) != _normalize(row):
+            updates += 1
+        layout.append(desired[key])
+    inserts = 0
+    for key, row in desired.items():
+        if key not in kept:
+            layout.append(row)
+            inserts += 1
+    return layout, inserts, updates, deletes
+
 
 def upload_to_sheet(data):
+    """Sync {ticker: [ScoredHeadline]} to the sheet: one read, then only the changed ranges are written."""
     try:
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(GOOGLE_SERVICE_ACCOUNT_JSON, scope)
-        client = gspread.authorize(creds)
-
-        sheet = client.open(SHEET_NAME).sheet1
-        sheet.clear()
-        # Added "Strategy", "Signal ID", and "Watch" columns
-        sheet.append_row([
-            "Ticker", "Headline", "Source", "Date", "Summary", "News Decision", "Catalyst Type",
-            "Confidence Score", "Visual Flag", "JMoney Confirmed", "Macro Score",
-            "Strategy", "Signal ID", "JMoney Note"
-        ])
-        # Read all existing rows for deduplication and update
-        all_rows = sheet.get_all_values()
-        headers = all_rows[0] if all_rows else []
-        existing = {(row[0], row[1]): idx for idx, row in enumerate(all_rows[1:], 2) if len(row) >= 2}  # (ticker, headline): row number
-        for ticker, headlines in data.items():
-            for item in headlines:
-                raw_date = item.get("date", "")
-                date = raw_date
-                try:
-                    import datetime
-                    if raw_date:
-                        dt = datetime.datetime.fromisoformat(raw_date.replace("Z", ""))
-                        date = dt.strftime("%Y-%m-%d %H:%M")
-                except Exception:
-                    pass
-                # Add strategy, signal_id, and watch
-                row_data = [
-                    item.get("ticker", ""),
-                    item.get("headline", ""),
-                    item.get("source", ""),
-                    date,
-                    item.get("summary", ""),
-                    item.get("news_decision", ""),
-                    item.get("catalyst_type", ""),
-                    item.get("confidence", ""),
-                    item.get("flag", ""),
-                    item.get("jmoney_confirmed", ""),
-                    item.get("macro_score", ""),
-                    item.get("strategy", ""),
-                    item.get("signal_type", ""),
-                    item.get("jmoney_note", "")
-                ]
-                sheet.append_row(row_data)
+        sheet = sheets_client.get_worksheet(SHEET_NAME)
+        with metrics.SHEETS_CALL_SECONDS.time(call="get_all_values"):
+            current = sheet.get_all_values()
+        desired_rows = [format_row(item) for headlines in data.values() for item in headlines]
+        layout, inserts, updates, deletes = diff_rows(current[1:], desired_rows)
+        grid = [HEADER] + layout
+
+        # Group changed rows into contiguous ranges for a single batch_update
+        last_column = _column_letter(len(HEADER))
+        ranges = []
+        start = None
+        for index in range(len(grid) + 1):
+            changed = index < len(grid) and (
+                index >= len(current) or _normalize(grid[index]) != _normalize(current[index])
+            )
+            if changed and start is None:
+                start = index
+            elif not changed and start is not None:
+                ranges.append({
+                    "range": f"A{start + 1}:{last_column}{index}",
+                    "values": [list(row) for row in grid[start:index]],
+                })
+                start = None
+
+        requests_made = 1
+        if len(grid) > sheet.row_count:
+            with metrics.SHEETS_CALL_SECONDS.time(call="add_rows"):
+                sheet.add_rows(len(grid) - sheet.row_count)
+            requests_made += 1
+        if ranges:
+            with metrics.SHEETS_CALL_SECONDS.time(call="batch_update"):
+                sheet.batch_update(ranges, value_input_option="RAW")
+            requests_made += 1
+        if len(current) > len(grid):
+            with metrics.SHEETS_CALL_SECONDS.time(call="batch_clear"):
+                sheet.batch_clear([f"A{len(grid) + 1}:{last_column}{len(current)}"])
+            requests_made += 1
+        logger.info("[Sheet] %d inserted, %d updated, %d deleted in %d requests", inserts, updates, deletes, requests_made)
     except Exception as e:
-        print(f"[Sheet Upload Error] {e}")
+        sheets_client.forget_handles()
+        metrics.ERRORS.inc(component="sheets")
+        logger.error("[Sheet Upload Error] %s", e)
@@ -0,0 +1,66 @@
+"""Process-wide Google Sheets client.
+
+Authorizes once with the service account. google-auth refreshes the
+access token only when it has expired, and the authorized session keeps
+pooled HTTP connections. Spreadsheet and worksheet handles are cached so
+repeated reads and writes skip the open/lookup round trips.
+"""
+import threading
+
+from config import GOOGLE_SERVICE_ACCOUNT_JSON
+
+SCOPES = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+_client = None
+_spreadsheets = {}
+_worksheets = {}
+_lock = threading.RLock()
+
+
+def get_client():
+    """Return the shared gspread client, authorizing on first use."""
+    global _client
+    with _lock:
+        if _client is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+            creds = Credentials.from_service_account_file(GOOGLE_SERVICE_ACCOUNT_JSON, scopes=SCOPES)
+            _client = gspread.authorize(creds)
+        return _client
+
+
+def get_spreadsheet(name):
+    """Return a cached handle to the spreadsheet with this title."""
+    with _lock:
+        if name not in _spreadsheets:
+            _spreadsheets[name] = get_client().open(name)
+        return _spreadsheets[name]
+
+
+def get_worksheet(spreadsheet_name, title=None):
+    """Return a cached worksheet handle; title=None means the first sheet."""
+    key = (spreadsheet_name, title)
+    with _lock:
+        if key not in _worksheets:
+            spreadsheet = get_spreadsheet(spreadsheet_name)
+            _worksheets[key] = spreadsheet.worksheet(title) if title else spreadsheet.sheet1
+        return _worksheets[key]
+
+
+def forget_handles():
+    """Drop cached spreadsheet/worksheet handles, e.g. after a sheet was renamed or an API error.
+
+    The authorized client is kept.
+    """
+    with _lock:
+        _spreadsheets.clear()
+        _worksheets.clear()
+
+
+def set_client(client):
+    """Replace the shared client (used to plug in a stand-in) and drop cached handles."""
+    global _client
+    with _lock:
+        _client = client
+        _spreadsheets.clear()
+        _worksheets.clear()
@@ -1,70 +1,296 @@
+import logging
 import os
+import queue
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import STATE_DIR, TELEGRAM_API_URL, TELEGRAM_MESSAGES_PER_MINUTE, TELEGRAM_DIGEST, TELEGRAM_DELETE_MAX_AGE_HOURS
+import metrics
+from message_store import MessageStore
+from rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
 
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
 
-# Track sent message IDs in a file
+# Sent message IDs are tracked in SQLite; the old text file is imported once
 MESSAGE_ID_FILE = "bot_message_ids.txt"
+MESSAGE_STORE_PATH = os.path.join(STATE_DIR, "telegram_messages.sqlite3")
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+DIGEST_SEPARATOR = "\n\n"
+# deleteMessages accepts at most this many IDs per call
+DELETE_CHUNK_SIZE = 100
+DELETE_WORKERS = 4
+# sendMessage attempts per queued alert before it is dropped (each 429 waits retry_after)
+SEND_ATTEMPTS = 5
+
+# Shared by every outbound message so queued alerts and command replies respect one limit
+send_bucket = TokenBucket(TELEGRAM_MESSAGES_PER_MINUTE)
+
+_message_store = None
+_store_lock = threading.Lock()
+
+def get_message_store():
+    global _message_store
+    with _store_lock:
+        if _message_store is None:
+            _message_store = MessageStore(MESSAGE_STORE_PATH, max_age=TELEGRAM_DELETE_MAX_AGE_HOURS * 3600)
+            _message_store.import_legacy_file(TELEGRAM_CHAT_ID, MESSAGE_ID_FILE)
+    return _message_store
 
 def track_message_id(message_id):
     try:
-        with open(MESSAGE_ID_FILE, "a") as f:
-            f.write(str(message_id) + "\n")
+        get_message_store().add(TELEGRAM_CHAT_ID, message_id)
     except Exception as e:
-        print(f"[Telegram] Failed to track message id {message_id}: {e}")
+        logger.error("[Telegram] Failed to track message id %s: %s", message_id, e)
 
 def get_tracked_message_ids():
     try:
-        with open(MESSAGE_ID_FILE, "r") as f:
-            return [int(line.strip()) for line in f if line.strip()]
-    except FileNotFoundError:
-        return []
+        return get_message_store().ids(TELEGRAM_CHAT_ID)
     except Exception as e:
-        print(f"[Telegram] Failed to read tracked message ids: {e}")
+        logger.error("[Telegram] Failed to read tracked message ids: %s", e)
         return []
 
-def clear_tracked_message_ids():
+def clear_tracked_message_ids(message_ids):
+    try:
+        get_message_store().remove(TELEGRAM_CHAT_ID, message_ids)
+    except Exception as e:
+        logger.error("[Telegram] Failed to clear tracked message ids: %s", e)
+
+
+def _post_message(text):
+    """POST one sendMessage, waiting on the shared rate limit.
+
+    Returns (retry_after, message_id). retry_after is the number of seconds
+    to wait before retrying when Telegram answers 429, else None (sent or
+    to be dropped); message_id is the sent message's ID, if any.
+    """
+    send_bucket.acquire()
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    payload = {"chat_id": TELEGRAM_CHAT_ID, "text": text, "parse_mode": "HTML"}
     try:
-        open(MESSAGE_ID_FILE, "w").close()
+        with metrics.TELEGRAM_SEND_SECONDS.time(method="sendMessage"):
+            resp = requests.post(url, data=payload, timeout=10)
+        if resp.ok:
+            data = resp.json()
+            message_id = data.get("result", {}).get("message_id")
+            if message_id:
+                track_message_id(message_id)
+            return None, message_id
+        elif resp.status_code == 429:
+            retry_after = resp.json().get("parameters", {}).get("retry_after", 1)
+            logger.warning("[Telegram] Rate limited, retrying in %ss", retry_after)
+            send_bucket.pause(retry_after)
+            return retry_after, None
+        else:
+            metrics.ERRORS.inc(component="telegram")
+            logger.error("[Telegram Error] Failed to send message: %s", resp.text)
     except Exception as e:
-        print(f"[Telegram] Failed to clear message id file: {e}")
+        metrics.ERRORS.inc(component="telegram")
+        logger.error("[Telegram Error] %s", e)
+    return None, None
+
+
+def _drop_rate_limited(text, attempts):
+    """Record a message given up on after every attempt was rate limited."""
+    metrics.ERRORS.inc(component="telegram")
+    logger.error(
+        "[Telegram Error] Dropped message to chat %s after %d rate-limited attempts: %.100s",
+        TELEGRAM_CHAT_ID, attempts, text,
+    )
 
 
 def send_telegram_message(text):
-    """Send a message to the configured Telegram chat."""
+    """Send a message to the configured Telegram chat right away (blocking); returns its ID or None."""
     if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {"chat_id": TELEGRAM_CHAT_ID, "text": text, "parse_mode": "HTML"}
-        try:
+        for attempt in range(3):
+            retry_after, message_id = _post_message(text)
+            if retry_after is None:
+                return message_id
+        _drop_rate_limited(text, 3)
+    else:
+        logger.warning("[Telegram] Bot token or chat ID not set in environment.")
+    return None
+
+
+def edit_telegram_message(message_id, text):
+    """Replace the text of a sent message (e.g. a progress line); True on success.
+
+    Best effort: a rate-limited or failed edit is logged and skipped.
+    """
+    if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID and message_id):
+        return False
+    send_bucket.acquire()
+    url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/editMessageText"
+    payload = {"chat_id": TELEGRAM_CHAT_ID, "message_id": message_id, "text": text, "parse_mode": "HTML"}
+    try:
+        with metrics.TELEGRAM_SEND_SECONDS.time(method="editMessageText"):
             resp = requests.post(url, data=payload, timeout=10)
+        if resp.ok:
+            return True
+        if resp.status_code == 429:
+            send_bucket.pause(resp.json().get("parameters", {}).get("retry_after", 1))
+            logger.warning("[Telegram] Rate limited, skipping edit of message %s", message_id)
+            return False
+        metrics.ERRORS.inc(component="telegram")
+        logger.error("[Telegram Error] Failed to edit message %s: %s", message_id, resp.text)
+    except Exception as e:
+        metrics.ERRORS.inc(component="telegram")
+        logger.error("[Telegram Error] %s", e)
+    return False
+
+
+def pack_digest(cards, max_length=MAX_MESSAGE_LENGTH):
+    """Pack cards into as few messages as fit within max_length each, keeping order."""
+    messages = []
+    current = ""
+    for card in cards:
+        card = card.strip()
+        if current and len(current) + len(DIGEST_SEPARATOR) + len(card) > max_length:
+            messages.append(current)
+            current = ""
+        current = current + DIGEST_SEPARATOR + card if current else card
+    if current:
+        messages.append(current)
+    return messages
+
+
+class TelegramSender:
+    """Background outbound queue for alert messages.
+
+    enqueue() returns immediately; a daemon thread sends messages within the
+    shared rate limit and retries after Telegram's retry_after on 429. In
+    digest mode, cards waiting in the queue are packed into messages of up
+    to 4096 characters.
+    """
+
+    def __init__(self, digest=TELEGRAM_DIGEST, max_length=MAX_MESSAGE_LENGTH):
+        self.digest = digest
+        self.max_length = max_length
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+                self._thread.start()
+
+    def enqueue(self, text):
+        if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
+            logger.warning("[Telegram] Bot token or chat ID not set in environment.")
+            return
+        self.start()
+        self.queue.put(text)
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been sent; True if drained in time."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
+
+    def _next_batch(self):
+        cards = [self.queue.get()]
+        if self.digest:
+            while True:
+                try:
+                    cards.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+        return cards
+
+    def _run(self):
+        while True:
+            cards = self._next_batch()
+            messages = pack_digest(cards, self.max_length) if self.digest else cards
+            for text in messages:
+                for attempt in range(SEND_ATTEMPTS):
+                    retry_after, _ = _post_message(text)
+                    if retry_after is None:
+                        break
+                    if attempt + 1 < SEND_ATTEMPTS:
+                        time.sleep(retry_after)
+                else:
+                    _drop_rate_limited(text, SEND_ATTEMPTS)
+            for _ in cards:
+                self.queue.task_done()
+
+
+_sender = TelegramSender()
+
+
+def enqueue_message(text):
+    """Queue an alert for background delivery without blocking the caller."""
+    _sender.enqueue(text)
+
+
+def flush_messages(timeout=None):
+    """Block until queued alerts are delivered (e.g. before a one-shot run exits)."""
+    return _sender.flush(timeout)
+
+
+def _delete_chunk(message_ids):
+    """Delete up to DELETE_CHUNK_SIZE messages with one deleteMessages call; True on success."""
+    del_url = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/deleteMessages"
+    for attempt in range(3):
+        try:
+            with metrics.TELEGRAM_SEND_SECONDS.time(method="deleteMessages"):
+                resp = requests.post(del_url, json={"chat_id": TELEGRAM_CHAT_ID, "message_ids": message_ids}, timeout=15)
             if resp.ok:
-                data = resp.json()
-                message_id = data.get("result", {}).get("message_id")
-                if message_id:
-                    track_message_id(message_id)
-            else:
-                print(f"[Telegram Error] Failed to send message: {resp.text}")
+                return True
+            if resp.status_code == 429:
+                time.sleep(resp.json().get("parameters", {}).get("retry_after", 1))
+                continue
+            metrics.ERRORS.inc(component="telegram")
+            logger.error("[Telegram] Failed to delete %d messages: %s", len(message_ids), resp.text)
+            return False
         except Exception as e:
-            print(f"[Telegram Error] {e}")
-    else:
-        print("[Telegram] Bot token or chat ID not set in environment.")
+            if attempt < 2:
+                metrics.RETRIES.inc(component="telegram")
+                logger.warning("[Telegram] Delete of %d messages failed, retrying: %s", len(message_ids), e)
+                continue
+            metrics.ERRORS.inc(component="telegram")
+            logger.error("[Telegram] Failed to delete %d messages: %s", len(message_ids), e)
+    return False
+
+
+def handle_clear_command(progress=None):
+    """Deletes all tracked messages in the chat. To be called when /clear is received.
 
-def handle_clear_command():
-    """Deletes all messages in the chat if the user is an admin. To be called when /clear is received."""
+    IDs are deleted in chunks of 100 with parallel deleteMessages calls.
+    progress(done, total) is called once before deleting and then as chunks
+    finish. Returns the number of messages deleted.
+    """
     if not (TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID):
-        print("[Telegram] Bot token or chat ID not set in environment.")
-        return
+        logger.warning("[Telegram] Bot token or chat ID not set in environment.")
+        return 0
     message_ids = get_tracked_message_ids()
-    print(f"[Telegram] Tracked message IDs to delete: {message_ids}")
-    for message_id in message_ids:
-        del_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/deleteMessage"
-        del_payload = {"chat_id": TELEGRAM_CHAT_ID, "message_id": message_id}
-        try:
-            resp = requests.post(del_url, data=del_payload, timeout=10)
-            if not resp.ok:
-                print(f"[Telegram] Failed to delete message {message_id}: {resp.text}")
-        except Exception as e:
-            print(f"[Telegram] Failed to delete message {message_id}: {e}")
-    clear_tracked_message_ids()
+    total = len(message_ids)
+    logger.info("[Telegram] %d tracked messages to delete.", total)
+    chunks = [message_ids[i:i + DELETE_CHUNK_SIZE] for i in range(0, total, DELETE_CHUNK_SIZE)]
+    done = deleted = 0
+    if progress:
+        progress(0, total)
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+        futures = {pool.submit(_delete_chunk, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            done += len(chunk)
+            if future.result():
+                deleted += len(chunk)
+            # Failed chunks are usually already gone or too old; don't retry them forever
+            clear_tracked_message_ids(chunk)
+            logger.info("[Telegram] Cleared %d/%d messages.", done, total)
+            if progress:
+                progress(done, total)
+    return deleted
@@ -0,0 +1,72 @@
+import classify
+import metrics
+
+
+class FlakyClient:
+    """Fails the first `failures` completion requests with a connection error."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("connection reset")
+        message = type("Message", (), {"content": " ok "})
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})]})
+
+
+def openai_count(counter):
+    return counter.snapshot().get(("openai",), 0)
+
+
+def retry_connection_errors(monkeypatch):
+    monkeypatch.setattr(classify.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(classify, "_is_retryable", lambda error: isinstance(error, ConnectionError))
+
+
+def test_retried_error_that_succeeds_is_not_an_error(monkeypatch):
+    retry_connection_errors(monkeypatch)
+    monkeypatch.setattr(classify, "_client", FlakyClient(failures=2))
+    errors, retries = openai_count(metrics.ERRORS), openai_count(metrics.RETRIES)
+    assert classify.create_completion("prompt", 10) == "ok"
+    assert openai_count(metrics.ERRORS) == errors
+    assert openai_count(metrics.RETRIES) == retries + 2
+
+
+def test_error_after_last_retry_is_counted(monkeypatch):
+    retry_connection_errors(monkeypatch)
+    monkeypatch.setattr(classify, "OPENAI_MAX_RETRIES", 1)
+    monkeypatch.setattr(classify, "_client", FlakyClient(failures=5))
+    errors = openai_count(metrics.ERRORS)
+    try:
+        classify.create_completion("prompt", 10)
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("expected the last attempt's error to be raised")
+    assert openai_count(metrics.ERRORS) == errors + 1
+
+
+def test_malformed_reply_is_not_cached(monkeypatch):
+    from classify_cache import ClassificationCache
+
+    replies = iter(['{"category": "Big News", "summary": "?"}', '{"summary": "partial"'])
+    monkeypatch.setattr(classify, "create_completion", lambda prompt, max_tokens: next(replies))
+    monkeypatch.setattr(classify, "_cache", ClassificationCache(":memory:"))
+    result = classify._classify_single("Tesla recalls 2 million vehicles", None)
+    assert result[classify.FAILED_KEY]
+    assert classify.get_cache().get(classify.cache_key("Tesla recalls 2 million vehicles")) is None
+
+
+def test_valid_reply_is_cached_normalized(monkeypatch):
+    from classify_cache import ClassificationCache
+
+    reply = '{"category": "Positive Catalyst", "summary": "Beat.", "confidence": "7", "filter_decision": "true", "x": 1}'
+    monkeypatch.setattr(classify, "create_completion", lambda prompt, max_tokens: reply)
+    monkeypatch.setattr(classify, "_cache", ClassificationCache(":memory:"))
+    expected = {"category": "Positive Catalyst", "summary": "Beat.", "confidence": 7.0, "filter_decision": True}
+    assert classify._classify_single("Apple beats estimates", None) == expected
+    assert classify.get_cache().get(classify.cache_key("Apple beats estimates")) == expected
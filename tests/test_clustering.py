@@ -0,0 +1,54 @@
+from clustering import cluster_headlines
+from records import Headline, ScoredHeadline
+
+
+def headline(text, source):
+    return Headline.scraped(text, source, "2024-01-01T00:00:00Z")
+
+
+def scored(text, source):
+    return ScoredHeadline.from_dict({"ticker": "TSLA", "headline": text, "source": source, "date": "2024-01-01T00:00:00Z"})
+
+
+def test_opposite_sense_headlines_stay_apart():
+    items = [
+        headline("Apple beats quarterly earnings estimates on iPhone sales", "Yahoo"),
+        headline("Apple misses quarterly earnings estimates on iPhone sales", "CNBC"),
+    ]
+    clustered, duplicates, _ = cluster_headlines({"AAPL": items})
+    assert [item.headline for item in clustered["AAPL"]] == [item.headline for item in items]
+    assert duplicates == {}
+
+
+def test_added_negation_is_a_different_story():
+    items = [
+        headline("Tesla recalls 2 million vehicles over Autopilot concerns", "Yahoo"),
+        headline("Tesla denies it recalls 2 million vehicles over Autopilot concerns", "CNBC"),
+    ]
+    clustered, _, _ = cluster_headlines({"TSLA": items})
+    assert len(clustered["TSLA"]) == 2
+
+
+def test_reworded_copies_fold_into_first():
+    items = [
+        headline("Tesla recalls 2 million vehicles over Autopilot concerns", "Yahoo"),
+        headline("UPDATE 1-Tesla recalls 2 million vehicles over Autopilot concerns", "Reuters"),
+        headline("Tesla recalls 2 million vehicles over Autopilot concerns - MarketWatch", "MarketWatch"),
+    ]
+    clustered, duplicates, _ = cluster_headlines({"TSLA": items})
+    [representative] = clustered["TSLA"]
+    assert representative.headline == items[0].headline
+    assert representative.sources == ("Yahoo", "Reuters", "MarketWatch")
+    assert representative.cluster_size == 3
+    assert duplicates["TSLA"] == items[1:]
+
+
+def test_copy_of_earlier_story_is_merged_into_its_result():
+    earlier = scored("Tesla recalls 2 million vehicles over Autopilot concerns", "Yahoo")
+    item = headline("UPDATE 1-Tesla recalls 2 million vehicles over Autopilot concerns", "Reuters")
+    clustered, duplicates, merged = cluster_headlines({"TSLA": [item]}, {"TSLA": [earlier]})
+    assert clustered["TSLA"] == []
+    assert duplicates["TSLA"] == [item]
+    assert merged["TSLA"] == [earlier]
+    assert earlier.sources == ("Yahoo", "Reuters")
+    assert earlier.cluster_size == 2
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from commands import CommandRouter
+
+
+def make_router(tmp_path, priority):
+    router = CommandRouter(
+        token="test", offset_path=str(tmp_path / "offset.json"), lock_path=str(tmp_path / "poller.lock"),
+        poll_timeout=0, reply=lambda text: None,
+        priority=priority, priority_lock_path=str(tmp_path / "poller.priority.lock"),
+    )
+    router.poll_once = lambda: time.sleep(0.05)
+    return router
+
+
+def test_runner_hands_the_poller_lock_to_main(tmp_path):
+    runner = make_router(tmp_path, priority=False)
+    runner_thread = threading.Thread(target=runner.run_forever, daemon=True)
+    runner_thread.start()
+    time.sleep(0.2)
+    main_router = make_router(tmp_path, priority=True)
+    assert main_router._acquire_with_priority()
+    runner_thread.join(5)
+    assert not runner_thread.is_alive()
+
+
+def test_runner_does_not_start_while_main_polls(tmp_path):
+    main_router = make_router(tmp_path, priority=True)
+    assert main_router._acquire_with_priority()
+    runner = make_router(tmp_path, priority=False)
+    runner.run_forever()
+    assert runner._lock_file is None
+
+
+def test_clear_reports_progress_in_one_message(monkeypatch):
+    import commands
+
+    sent, edits = [], []
+
+    def fake_clear(progress):
+        for done in (0, 100, 200, 250):
+            progress(done, 250)
+        return 250
+
+    def send(text):
+        sent.append(text)
+        return 42
+
+    monkeypatch.setattr(commands, "handle_clear_command", fake_clear)
+    monkeypatch.setattr(commands, "send_telegram_message", send)
+    monkeypatch.setattr(commands, "edit_telegram_message", lambda message_id, text: edits.append((message_id, text)))
+    monkeypatch.setattr(commands, "CLEAR_PROGRESS_INTERVAL", 0)
+    assert commands.clear_handler("") == "Cleared 250 messages."
+    assert sent == ["Clearing messages: 0/250"]
+    assert edits == [(42, "Clearing messages: 100/250"), (42, "Clearing messages: 200/250")]
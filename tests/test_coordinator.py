@@ -0,0 +1,82 @@
+import threading
+
+from coordinator import RunCoordinator
+from main import covers_sources
+
+
+def blocking_target(release):
+    calls = []
+
+    def target(**kwargs):
+        calls.append(kwargs)
+        release.wait(5)
+        return kwargs
+    return target, calls
+
+
+def test_fetch_during_partial_run_is_queued_not_joined():
+    release = threading.Event()
+    target, calls = blocking_target(release)
+    coordinator = RunCoordinator(target, covers=covers_sources)
+    scheduled, action = coordinator.trigger("scheduled", loop_count=1)
+    assert action == "started"
+    fetch, action = coordinator.trigger("/fetch", all_sources=True)
+    assert action == "queued"
+    release.set()
+    assert fetch.future.result(5)["all_sources"] is True
+    assert [c.get("all_sources", False) for c in calls] == [False, True]
+
+
+def test_scheduled_trigger_joins_full_run():
+    release = threading.Event()
+    target, calls = blocking_target(release)
+    coordinator = RunCoordinator(target, covers=covers_sources)
+    fetch, _ = coordinator.trigger("/fetch", all_sources=True)
+    scheduled, action = coordinator.trigger("scheduled", loop_count=2)
+    assert action == "joined" and scheduled is fetch
+    release.set()
+    fetch.future.result(5)
+    assert len(calls) == 1
+
+
+def test_get_coordinator_builds_one_instance_across_threads(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "_coordinator", None)
+    seen = []
+    barrier = threading.Barrier(8)
+
+    def get():
+        barrier.wait()
+        seen.append(main.get_coordinator())
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(c) for c in seen}) == 1
+
+
+def test_failed_scheduled_cycle_does_not_stop_the_loop(monkeypatch):
+    import config
+    import main
+    import metrics
+
+    calls = []
+
+    def target(loop_count):
+        calls.append(loop_count)
+        if loop_count == 1:
+            raise RuntimeError("Sheet unreachable")
+
+    class Scheduler:
+        def next_due(self):
+            return 0
+
+    monkeypatch.setattr(config, "POLL_MIN_INTERVAL", 0)
+    monkeypatch.setattr(main, "get_coordinator", lambda: RunCoordinator(target))
+    monkeypatch.setattr(main, "get_scheduler", lambda: Scheduler())
+    errors = metrics.ERRORS.snapshot().get(("main",), 0)
+    main.run_loop(cycles=3)
+    assert calls == [1, 2, 3]
+    assert metrics.ERRORS.snapshot().get(("main",), 0) == errors + 1
@@ -0,0 +1,15 @@
+import jmoney
+import sheets_client
+
+
+class BrokenClient:
+    def open(self, name):
+        raise ConnectionError("sheet unreachable")
+
+
+def test_failed_read_without_snapshot_is_reported(monkeypatch):
+    monkeypatch.setattr(jmoney, "load_snapshot", lambda: None)
+    monkeypatch.setattr(jmoney, "_snapshot", None)
+    monkeypatch.setattr(sheets_client, "_client", BrokenClient())
+    assert jmoney.get_jmoney_signals() == {}
+    assert not jmoney.signals_available()
@@ -0,0 +1,36 @@
+import datetime
+
+import classify
+from classify_cache import ClassificationCache
+from pipeline import run_pipeline
+from records import Headline
+
+NOW = datetime.datetime(2024, 1, 1, 1)
+
+
+def test_no_alert_when_classification_fails(monkeypatch):
+    def unreachable(prompt, max_tokens):
+        raise ConnectionError("API outage")
+
+    monkeypatch.setattr(classify, "create_completion", unreachable)
+    monkeypatch.setattr(classify, "_cache", ClassificationCache(":memory:"))
+    headlines = {"TSLA": [Headline.scraped("Tesla recalls 2 million vehicles", "Reuters", "2024-01-01T00:00:00Z")]}
+
+    cards = []
+    results, _ = run_pipeline(headlines, {}, send=cards.append, now=NOW)
+    assert not results["TSLA"][0].classified
+    assert cards == []
+
+
+def test_alert_once_classification_succeeds(monkeypatch):
+    def reply(prompt, max_tokens):
+        return '{"filter_decision": true, "category": "Negative Catalyst", "summary": "Recall."}'
+
+    monkeypatch.setattr(classify, "create_completion", reply)
+    monkeypatch.setattr(classify, "_cache", ClassificationCache(":memory:"))
+    headlines = {"TSLA": [Headline.scraped("Tesla recalls 2 million vehicles", "Reuters", "2024-01-01T00:00:00Z")]}
+
+    cards = []
+    results, _ = run_pipeline(headlines, {}, send=cards.append, now=NOW)
+    assert results["TSLA"][0].classified
+    assert len(cards) == 1 and "Tesla recalls" in cards[0]
@@ -0,0 +1,26 @@
+import datetime
+
+import classify
+from classify_cache import ClassificationCache
+from pipeline import run_pipeline
+from records import Headline
+from seen_store import SeenStore
+
+
+def test_failed_classification_is_retried_next_cycle(tmp_path, monkeypatch):
+    def unreachable(prompt, max_tokens):
+        raise ConnectionError("API outage")
+
+    monkeypatch.setattr(classify, "create_completion", unreachable)
+    monkeypatch.setattr(classify, "_cache", ClassificationCache(":memory:"))
+    store = SeenStore(str(tmp_path / "seen.sqlite3"))
+    headlines = {"TSLA": [Headline.scraped("Tesla recalls 2 million vehicles", "Reuters", "2024-01-01T00:00:00Z")]}
+
+    new, _ = store.split_new(headlines)
+    results, _ = run_pipeline(new, {}, send=lambda card: None, now=datetime.datetime(2024, 1, 1, 1))
+    assert not results["TSLA"][0].classified
+    store.record(results)
+
+    new, carried = store.split_new(headlines)
+    assert new == headlines
+    assert carried == {}
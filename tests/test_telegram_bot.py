@@ -0,0 +1,24 @@
+import logging
+
+import metrics
+import telegram_bot
+
+
+def test_alert_dropped_after_rate_limits_is_logged_and_counted(monkeypatch, caplog):
+    attempts = []
+
+    def rate_limited(text):
+        attempts.append(text)
+        return 0.01, None
+
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(telegram_bot, "TELEGRAM_CHAT_ID", "-100")
+    monkeypatch.setattr(telegram_bot, "_post_message", rate_limited)
+    errors = metrics.ERRORS.snapshot().get(("telegram",), 0)
+    sender = telegram_bot.TelegramSender(digest=False)
+    with caplog.at_level(logging.ERROR, logger="telegram_bot"):
+        sender.enqueue("TSLA alert")
+        assert sender.flush(timeout=5)
+    assert len(attempts) == telegram_bot.SEND_ATTEMPTS
+    assert metrics.ERRORS.snapshot().get(("telegram",), 0) == errors + 1
+    assert "Dropped message to chat -100" in caplog.text and "TSLA alert" in caplog.text